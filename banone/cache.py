@@ -0,0 +1,51 @@
+"""Module providing a bounded least-recently-used cache."""
+import threading
+from collections import OrderedDict
+
+from typing import Generic
+from typing import Hashable
+from typing import Optional
+from typing import TypeVar
+
+T = TypeVar("T")
+
+
+class LRUCache(Generic[T]):
+    """Mapping that keeps at most `maxsize` values, dropping the oldest used."""
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        """Create an empty cache."""
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, T]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return the number of cached values."""
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Optional[T]:
+        """Return the value for `key` and mark it as used, or `None`."""
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key: Hashable, value: T) -> None:
+        """Store `value` for `key`, dropping the least recently used value."""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all values."""
+        with self._lock:
+            self._data.clear()
@@ -0,0 +1,142 @@
+"""Module providing a SQLite database of generated riddles."""
+import sqlite3
+from pathlib import Path
+
+from typing import Iterable
+from typing import List
+from typing import Optional
+
+from banone.dictionary import Dictionary
+from banone.generator import Riddle
+
+# Columns of the riddles table after the riddle itself, taken from its lemmas.
+trait_columns = (
+    "color",
+    "base_property",
+    "extra_property",
+    "base_action",
+    "extra_action",
+)
+
+# Columns that riddles can be looked up by.
+indexed_columns = ["base", "extra", "color", "base_property", "extra_property"]
+
+
+class RiddleDatabase:
+    """SQLite database of riddles and the traits of the words they are made of."""
+
+    def __init__(self, path: Path) -> None:
+        """Open the database at `path` and create the table if necessary.
+
+        A riddle is identified by its base, extra word and compound, so that
+        exporting the same riddles again replaces them instead of adding
+        duplicates.
+        """
+        self.connection = sqlite3.connect(str(path))
+        columns = ", ".join(Riddle._fields + trait_columns)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS riddles "
+            "({}, UNIQUE (base, extra, compound))".format(columns)
+        )
+
+    def __enter__(self) -> "RiddleDatabase":
+        """Return the database itself."""
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        """Close the database."""
+        self.close()
+
+    def close(self) -> None:
+        """Close the connection to the database."""
+        self.connection.close()
+
+    def add_riddles(
+        self, riddles: Iterable[Riddle], dictionary: Dictionary, batch_size: int = 10000
+    ) -> int:
+        """Insert riddles with the traits of their words from `dictionary`.
+
+        The riddles are inserted in batches of `batch_size` within a single
+        transaction. Riddles that are already in the database are replaced.
+        Return the number of inserted riddles.
+        """
+        count = 0
+        sql = "INSERT OR REPLACE INTO riddles VALUES ({})".format(
+            ", ".join(["?"] * (len(Riddle._fields) + len(trait_columns)))
+        )
+
+        with self.connection:
+            batch = []
+            for riddle in riddles:
+                base = dictionary.lookup(riddle.base)
+                extra = dictionary.lookup(riddle.extra)
+                if base is None or extra is None:
+                    raise KeyError("unknown word in riddle: {}".format(riddle.compound))
+
+                # The color mentioned in the question, as in `generate_question`.
+                traits = (
+                    extra.color or base.color,
+                    base.property,
+                    extra.property,
+                    base.action,
+                    extra.action,
+                )
+                batch.append(tuple(riddle) + traits)
+                if len(batch) >= batch_size:
+                    self.connection.executemany(sql, batch)
+                    count += len(batch)
+                    batch.clear()
+
+            self.connection.executemany(sql, batch)
+            count += len(batch)
+
+            # Indexes are created after the first bulk insert, which is faster
+            # than updating them for every row.
+            for column in indexed_columns:
+                self.connection.execute(
+                    "CREATE INDEX IF NOT EXISTS riddles_{0} ON riddles ({0})".format(
+                        column
+                    )
+                )
+
+            # Collect statistics so that the most selective index is used.
+            self.connection.execute("ANALYZE")
+
+        return count
+
+    def find(
+        self,
+        base: Optional[str] = None,
+        extra: Optional[str] = None,
+        color: Optional[str] = None,
+        property: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Riddle]:
+        """Return the riddles matching all given traits.
+
+        `property` may be a property of either word. Example: all riddles with
+        the color "gelb" and the base word "Banane".
+        """
+        conditions = []
+        params: List[object] = []
+        for column, value in [("base", base), ("extra", extra), ("color", color)]:
+            if value is not None:
+                conditions.append("{} = ?".format(column))
+                params.append(value)
+        if property is not None:
+            conditions.append("(base_property = ? OR extra_property = ?)")
+            params.extend([property, property])
+
+        sql = "SELECT {} FROM riddles".format(", ".join(Riddle._fields))
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY rowid"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        return [Riddle(*row) for row in self.connection.execute(sql, params)]
+
+    def count(self) -> int:
+        """Return the number of riddles in the database."""
+        return self.connection.execute("SELECT COUNT(*) FROM riddles").fetchone()[0]
@@ -1,24 +1,202 @@
 """Module providing the Dictionary class."""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+from array import array
 from collections import Counter
+from contextlib import suppress
+from functools import lru_cache
 from pathlib import Path
 
 import yaml
 from typing import Dict
 from typing import Iterator
+from typing import List
 from typing import Optional
+from typing import Tuple
+from typing import Union
 
 from banone.lemma import Lemma
+from banone.lemma import parse_lemmas
+
+# Use the much faster C implementation of the YAML loader if it is available.
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader  # type: ignore
+
+# Version of the compiled dictionary format. Increase it whenever the layout of
+# the records changes so that outdated caches are rebuilt.
+CACHE_VERSION = 7
+
+# Header of a cache: magic bytes, version and SHA-256 digests of the YAML file
+# and of the records that follow.
+cache_header = struct.Struct("<8sI32s32s")
+cache_magic = b"BANONEC\n"
+
+# Sizes of the three parts of a record: orthographic form, JSON lemma entry
+# and packed sounds of the lemma and its stem.
+record_header = struct.Struct("<HII")
+
+
+def get_cache_path(path: Path) -> Path:
+    """Return the path of the compiled cache of the dictionary at `path`."""
+    return path.with_suffix(".cache")
+
+
+def pack_record(lemma: Lemma) -> bytes:
+    """Return the record of a lemma as stored in caches and compiled files."""
+    orth = lemma.orth.encode("utf-8")
+    body = json.dumps(lemma.to_dict(), ensure_ascii=False).encode("utf-8")
+    sounds = lemma.pack_sounds()
+    return record_header.pack(len(orth), len(body), len(sounds)) + orth + body + sounds
+
+
+def unpack_record(data: Union[bytes, mmap.mmap], offset: int) -> Tuple[Lemma, int]:
+    """Create the lemma whose record starts at `offset` in `data`.
+
+    Return the lemma and the offset of the next record. Only plain data is
+    read, so a damaged or manipulated file cannot run any code.
+    """
+    orth_size, body_size, sounds_size = record_header.unpack_from(data, offset)
+    start = offset + record_header.size
+    body_start = start + orth_size
+    sounds_start = body_start + body_size
+    end = sounds_start + sounds_size
+    if end > len(data):
+        raise ValueError("truncated record at offset {}".format(offset))
+
+    orth = data[start:body_start].decode("utf-8")
+    lemma_dict = json.loads(data[body_start:sounds_start])
+    if not isinstance(lemma_dict, dict):
+        raise ValueError("invalid record at offset {}".format(offset))
+
+    lemma = Lemma(orth, lemma_dict)
+    lemma.unpack_sounds(data[sounds_start:end])
+    return lemma, end
 
 
 class Dictionary:
     """Dictionary of words to be used in joke riddles."""
 
-    def __init__(self, path: Path) -> None:
-        """Load Dictionary from a YAML file."""
-        self.entries: Dict[str, Lemma] = {}
-        with path.open(encoding="utf-8") as file:
-            for orth, lemma_dict in yaml.safe_load(file).items():
-                self.entries[orth] = Lemma(orth, lemma_dict)
+    _extra_index: Optional[Dict[Optional[str], List[str]]] = None
+
+    def __init__(self, path: Path, use_cache: bool = True) -> None:
+        """Load Dictionary from a YAML file.
+
+        Unless `use_cache` is `False`, the parsed entries are stored in a
+        compiled cache file next to the YAML file and loaded from there as long
+        as the content of the YAML file does not change.
+        """
+        data = path.read_bytes()
+        digest = hashlib.sha256(data).digest()
+        cache_path = get_cache_path(path)
+
+        entries = None
+        if use_cache:
+            entries = self._load_cache(cache_path, digest)
+
+        if entries is None:
+            entries = self._parse_yaml(data)
+            if use_cache:
+                self._write_cache(cache_path, digest, entries)
+
+        self.entries: Dict[str, Lemma] = entries
+        self._build_nucleus_index()
+
+    @staticmethod
+    def _parse_yaml(data: bytes) -> Dict[str, Lemma]:
+        """Create the dictionary entries from the content of a YAML file."""
+        entries = {
+            orth: Lemma(orth, lemma_dict)
+            for orth, lemma_dict in yaml.load(data, Loader=SafeLoader).items()
+        }
+        # Parse the sounds only once so that they can be reused for every pair
+        # of words the lemma is part of.
+        parse_lemmas(entries.values())
+        return entries
+
+    @staticmethod
+    def _load_cache(cache_path: Path, digest: bytes) -> Optional[Dict[str, Lemma]]:
+        """Load the entries from the cache if it matches the YAML content.
+
+        The cache holds the header and the records of all lemmas. A cache that
+        cannot be read for any reason, e.g. because it is corrupted, is ignored.
+        """
+        try:
+            data = cache_path.read_bytes()
+            magic, version, yaml_digest, records_digest = cache_header.unpack_from(data)
+            if (magic, version, yaml_digest) != (cache_magic, CACHE_VERSION, digest):
+                return None
+
+            offset = cache_header.size
+            if hashlib.sha256(data[offset:]).digest() != records_digest:
+                return None
+
+            entries = {}
+            while offset < len(data):
+                lemma, offset = unpack_record(data, offset)
+                entries[lemma.orth] = lemma
+        except Exception:
+            return None
+
+        return entries
+
+    @staticmethod
+    def _write_cache(
+        cache_path: Path, digest: bytes, entries: Dict[str, Lemma]
+    ) -> None:
+        """Write the entries to the cache, ignoring locations that are read-only.
+
+        The cache is written to a temporary file of its own first, so that
+        concurrent runs never write into the same file.
+        """
+        records = b"".join(pack_record(lemma) for lemma in entries.values())
+        header = cache_header.pack(
+            cache_magic, CACHE_VERSION, digest, hashlib.sha256(records).digest()
+        )
+
+        try:
+            fd, tmp_name = tempfile.mkstemp(
+                prefix=cache_path.name + ".", suffix=".tmp", dir=cache_path.parent
+            )
+        except OSError:
+            return
+
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(header)
+                file.write(records)
+            os.replace(tmp_name, cache_path)
+        except OSError:
+            with suppress(OSError):
+                os.unlink(tmp_name)
+
+    def _build_nucleus_index(self) -> None:
+        """Group the nouns by the sound class of their first full vowel.
+
+        Two words can only be merged if their first full vowels match, so
+        for any extra word only the nouns in one group need to be tried.
+        """
+        self.nucleus_index: Dict[str, List[Lemma]] = {}
+        self.vowelless_nouns: List[Lemma] = []
+
+        for noun in self.iter_nouns():
+            key = noun.get_sound_sequence().get_nucleus_class()
+
+            # Nouns without a full vowel are compatible with every extra word.
+            if key is None:
+                self.vowelless_nouns.append(noun)
+                for bucket in self.nucleus_index.values():
+                    bucket.append(noun)
+                continue
+
+            if key not in self.nucleus_index:
+                self.nucleus_index[key] = list(self.vowelless_nouns)
+            self.nucleus_index[key].append(noun)
 
     def __iter__(self) -> Iterator[Lemma]:
         """Iterate over dictionary entries."""
@@ -29,10 +207,59 @@ class Dictionary:
         """Look up a word in the dictionary."""
         return self.entries.get(s)
 
+    def update(self, s: str, lemma_dict: Dict[str, str]) -> Lemma:
+        """Add a word or replace its entry, and update the indexes."""
+        lemma = self.entries.get(s)
+        if lemma is None:
+            lemma = self.entries[s] = Lemma(s, lemma_dict)
+        else:
+            lemma.update(lemma_dict)
+
+        self._build_nucleus_index()
+        self._extra_index = None
+        return lemma
+
     def iter_nouns(self) -> Iterator[Lemma]:
         """Iterate over the nouns in the dictionary."""
         return (lemma for lemma in self if lemma.pos == "NN")
 
+    def iter_bases(self, extra: Lemma) -> Iterator[Lemma]:
+        """Iterate over the nouns that can possibly be merged with `extra`."""
+        key = extra.get_stem_sound_sequence().get_nucleus_class()
+
+        # Extra words without a full vowel cannot be merged at all.
+        if key is None:
+            return iter([])
+
+        return iter(self.nucleus_index.get(key, self.vowelless_nouns))
+
+    def iter_extras(self, base: Lemma) -> Iterator[Lemma]:
+        """Iterate over the words that can possibly be merged into `base`.
+
+        This is the reverse of `iter_bases`. The index it uses is built on
+        first use.
+        """
+        if base.pos != "NN":
+            return
+
+        if self._extra_index is None:
+            # Words without a full vowel cannot be merged at all. All other
+            # words are listed under `None` as well, for bases without a
+            # full vowel, which are compatible with every extra word.
+            index: Dict[Optional[str], List[str]] = {None: []}
+            for lemma in self:
+                key = lemma.get_stem_sound_sequence().get_nucleus_class()
+                if key is not None:
+                    index[None].append(lemma.orth)
+                    index.setdefault(key, []).append(lemma.orth)
+            self._extra_index = index
+
+        key = base.get_sound_sequence().get_nucleus_class()
+        for orth in self._extra_index.get(key, []):
+            extra = self.lookup(orth)
+            if extra is not None:
+                yield extra
+
     def show_stats(self) -> None:
         """Print statistics about the words currently in the dictionary."""
         pos_counter: Counter = Counter()
@@ -50,3 +277,155 @@ class Dictionary:
         print("------------------------")
         print("Total:\t{:>10}".format(sum(pos_counter.values())))
         print("========================")
+
+
+class MappedDictionary(Dictionary):
+    """Dictionary that reads its entries lazily from a memory-mapped file.
+
+    Only the offsets of the entries are looked up in the file, lemmas are
+    created on demand from their parsed sounds. A bounded number of them is
+    kept for reuse, which keeps the memory usage flat even for very large
+    lexicons. Use `compile_mapped` to create the file from a YAML dictionary.
+
+    File layout:
+    * header: magic bytes, number of offsets, position and size of the index
+    * table of 8-byte record offsets, split into the sections named in the index
+    * records: sizes of the three parts, orthographic form, JSON lemma entry,
+      packed sounds of the lemma and its stem
+    * index: JSON object mapping section names to (first, count) in the table
+    """
+
+    magic = b"BANONE2\n"
+    header = struct.Struct("<8sQQQ")
+
+    def __init__(self, path: Path, cache_size: int = 65536) -> None:
+        """Map a compiled dictionary file into memory.
+
+        Up to `cache_size` lemmas are kept, so that the nouns of a bucket are
+        not created again for every extra word.
+        """
+        self._read = lru_cache(cache_size)(self._read_record)
+        with path.open("rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, count, index_start, index_size = self.header.unpack_from(self._mmap)
+        if magic != self.magic:
+            raise ValueError("{} is not a compiled dictionary".format(path))
+
+        index_end = index_start + index_size
+        index = json.loads(self._mmap[index_start:index_end])
+
+        table_start = self.header.size
+        table_end = table_start + 8 * count
+        table = memoryview(self._mmap)[table_start:table_end].cast("Q")
+
+        def section(name: str) -> memoryview:
+            first, size = index[name]
+            end = first + size
+            return table[first:end]
+
+        self._order = section("order")
+        self._sorted = section("sorted")
+        self._vowelless_nouns = section("vowelless")
+        self._buckets = {
+            name.partition(":")[2]: section(name)
+            for name in index
+            if name.startswith("bucket:")
+        }
+
+    def _read_orth(self, offset: int) -> bytes:
+        """Return the encoded orthographic form of the record at `offset`."""
+        orth_size, _, _ = record_header.unpack_from(self._mmap, offset)
+        start = offset + record_header.size
+        end = start + orth_size
+        return self._mmap[start:end]
+
+    def _read_record(self, offset: int) -> Lemma:
+        """Create the lemma whose record starts at `offset`."""
+        lemma, _ = unpack_record(self._mmap, offset)
+        return lemma
+
+    def __iter__(self) -> Iterator[Lemma]:
+        """Iterate over dictionary entries."""
+        for offset in self._order:
+            yield self._read(offset)
+
+    def lookup(self, s: str) -> Optional[Lemma]:
+        """Look up a word in the dictionary."""
+        key = s.encode("utf-8")
+
+        # Binary search in the offsets sorted by orthographic form.
+        lo, hi = 0, len(self._sorted)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._read_orth(self._sorted[mid]) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        if lo < len(self._sorted) and self._read_orth(self._sorted[lo]) == key:
+            return self._read(self._sorted[lo])
+        return None
+
+    def update(self, s: str, lemma_dict: Dict[str, str]) -> Lemma:
+        """Compiled dictionaries cannot be changed."""
+        raise TypeError("compiled dictionaries are read-only")
+
+    def iter_bases(self, extra: Lemma) -> Iterator[Lemma]:
+        """Iterate over the nouns that can possibly be merged with `extra`."""
+        key = extra.get_stem_sound_sequence().get_nucleus_class()
+
+        # Extra words without a full vowel cannot be merged at all.
+        if key is None:
+            return
+
+        for offset in self._buckets.get(key, self._vowelless_nouns):
+            yield self._read(offset)
+
+
+def compile_mapped(source: Path, target: Path) -> None:
+    """Compile the YAML dictionary `source` into a file for `MappedDictionary`."""
+    dictionary = Dictionary(source, use_cache=False)
+
+    sections = {
+        "order": [lemma.orth for lemma in dictionary],
+        "vowelless": [lemma.orth for lemma in dictionary.vowelless_nouns],
+    }
+    sections["sorted"] = sorted(sections["order"], key=lambda o: o.encode("utf-8"))
+    for key, bucket in dictionary.nucleus_index.items():
+        sections["bucket:" + key] = [lemma.orth for lemma in bucket]
+
+    index = {}
+    count = 0
+    for name, orths in sections.items():
+        index[name] = (count, len(orths))
+        count += len(orths)
+
+    # The records follow the header and the table of offsets.
+    records = bytearray()
+    records_start = MappedDictionary.header.size + 8 * count
+    offsets = {}
+    for lemma in dictionary:
+        offsets[lemma.orth] = records_start + len(records)
+        records += pack_record(lemma)
+
+    table = array("Q", (offsets[orth] for orths in sections.values() for orth in orths))
+    index_bytes = json.dumps(index).encode("utf-8")
+    index_start = records_start + len(records)
+
+    with target.open("wb") as file:
+        file.write(
+            MappedDictionary.header.pack(
+                MappedDictionary.magic, count, index_start, len(index_bytes)
+            )
+        )
+        file.write(table.tobytes())
+        file.write(records)
+        file.write(index_bytes)
+
+
+def load_dictionary(path: Path) -> Dictionary:
+    """Load a YAML dictionary or a compiled one, depending on the file suffix."""
+    if path.suffix == ".lex":
+        return MappedDictionary(path)
+    return Dictionary(path)
@@ -1,76 +1,587 @@
 """Module providing the Generator class."""
+import asyncio
+import heapq
+import os
+import random
+import time
+from array import array
+from collections import deque
+from concurrent.futures import Executor
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import suppress
+from functools import lru_cache
+from itertools import chain
+from itertools import repeat
 from pathlib import Path
 
+from typing import AsyncIterator
+from typing import Deque
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
 from typing import List
+from typing import NamedTuple
 from typing import Optional
+from typing import Tuple
+from typing import Union
 
-from banone.dictionary import Dictionary
+from banone.cache import LRUCache
+from banone.dictionary import load_dictionary
 from banone.lemma import Lemma
+from banone.overlap import OverlapIndex
+from banone.sound import MergeScore
+from banone.sound import near_matches
+from banone.sound import set_near_matches
+from banone.stats import PipelineStats
+from banone.stats import stats
+from banone.vectorized import VectorizedEngine
+
+
+class Riddle(NamedTuple):
+    """A joke riddle together with the words it was made of."""
+
+    base: str
+    extra: str
+    compound: str
+    question: str
+    answer: Optional[str]
+
+    def __str__(self) -> str:
+        """Return the riddle as question and answer on two lines."""
+        return str.format("{}\n{}", self.question, self.answer)
 
 
 class Generator:
     """Joke riddle generator."""
 
-    def __init__(self, dict_path: Path):
-        """Initialize generator."""
-        self.dict = Dictionary(dict_path)
+    def __init__(
+        self,
+        dict_path: Path,
+        partner_cache_size: int = 1024,
+        memo_size: Optional[int] = 4096,
+    ):
+        """Initialize generator.
+
+        The riddles found by `find_partners` are kept for the
+        `partner_cache_size` most recently queried words. At most `memo_size`
+        questions are memoized (`None` for no limit). The near matches are set
+        for the whole process with `set_near_matches`, which has to be called
+        before the generator is created.
+        """
+        self.dict_path = dict_path
+        with stats.timer("load dictionary"):
+            self.dict = load_dictionary(dict_path)
+        self._noun_count: Optional[int] = None
+        self.partner_cache: LRUCache[Tuple[Riddle, ...]] = LRUCache(partner_cache_size)
+
+        # Valid pairs of extra and base words as positions in `_orths`, for
+        # sampling. They are collected on first use.
+        self._orths: List[str] = []
+        self._pairs: Optional[array] = None
+
+        # Questions only depend on a few lemma fields, which are shared by many
+        # pairs, so they are memoized on these values. Answers contain the
+        # compound, which is different for every pair.
+        self._format_question = lru_cache(memo_size)(format_question)
 
     def generate_question(self, base: Lemma, extra: Lemma) -> str:
         """Generate the question for asking for the result of merging two lemmas."""
-        is_properties: List[Optional[str]] = []
+        # The color of the extra word is preferred over that of the base.
+        return self._format_question(
+            extra.color or base.color,
+            base.property,
+            extra.property,
+            base.action,
+            extra.action,
+        )
 
-        # If a color is specified, it should be mentioned first in the question.
-        color = extra.color or base.color
-        if color:
-            is_properties.append(color)
+    def generate_answer(self, base: Lemma, compound: Lemma) -> Optional[str]:
+        """Generate an answer containing `compound` and the determiner of `base`."""
+        return format_answer(base.determiner, compound.orth)
 
-        # Add additional properties.
-        is_properties.append(base.property)
-        is_properties.append(extra.property)
-        props = [prop for prop in is_properties if prop is not None]
+    def make_riddle(self, base: Lemma, extra: Lemma) -> Optional[Riddle]:
+        """Create a structured joke riddle using the lemmas `base` and `extra`."""
+        if stats.enabled:
+            return self._make_riddle_instrumented(base, extra)
 
-        # Add actions.
-        actions = [prop for prop in [base.action, extra.action] if prop is not None]
+        compound = base.merge(extra)
+        if compound:
+            return self._build_riddle(base, extra, compound)
 
-        all_props = props + actions
-        predicates = ", ".join(all_props[:-1])
+        return None
 
-        # Add a copula verb if there are properties that are adjectives.
-        if props:
-            predicates = "ist {}".format(predicates)
+    def _make_riddle_instrumented(self, base: Lemma, extra: Lemma) -> Optional[Riddle]:
+        """Create a riddle like `make_riddle` and measure its stages."""
+        start = time.perf_counter()
+        compound = base.merge(extra)
+        merged = time.perf_counter()
+        stats.add_time("merge", merged - start)
 
-        q = "Was {} und {}?".format(predicates, all_props[-1])
+        if not compound:
+            return None
 
-        return q
+        riddle = self._build_riddle(base, extra, compound)
+        stats.add_time("question and answer", time.perf_counter() - merged)
+        return riddle
 
-    def generate_answer(self, base: Lemma, compound: Lemma) -> Optional[str]:
-        """Generate an answer containing `compound` and the determiner of `base`."""
-        det = base.determiner
-        if det:
-            a = str.format("{} {}.", det.capitalize(), compound)
-            return a
-        return None
+    def _build_riddle(self, base: Lemma, extra: Lemma, compound: Lemma) -> Riddle:
+        """Create the riddle for a compound of `base` and `extra`."""
+        q = self.generate_question(base, extra)
+        a = self.generate_answer(base, compound)
+
+        if stats.enabled:
+            stats.count("riddles")
+            if a is None:
+                stats.reject("base without determiner")
+
+        return Riddle(base.orth, extra.orth, compound.orth, q, a)
 
     def generate_riddle(self, base: Lemma, extra: Lemma) -> Optional[str]:
         """Generate a joke riddle using the lemmas `base` and `extra`."""
-        compound = base.merge(extra)
-        if compound:
-            q = self.generate_question(base, extra)
-            a = self.generate_answer(base, compound)
-            return str.format("{}\n{}", q, a)
+        riddle = self.make_riddle(base, extra)
+        if riddle:
+            return str(riddle)
 
         return None
 
-    def generate_all(self) -> None:
-        """Generate all possible riddles based on the current dictionary."""
-        riddle_counter = 0
+    def _list_bases(self, extra: Lemma) -> List[Lemma]:
+        """Return the nouns other than `extra` that it may be merged into.
+
+        All riddles of the whole dictionary are generated from these pairs, so
+        that the pairs are counted in the same way for every kind of riddle.
+        """
+        if not stats.enabled:
+            return [b for b in self.dict.iter_bases(extra) if b.orth != extra.orth]
+
+        bases = []
+        candidates = 0
+        for base in self.dict.iter_bases(extra):
+            candidates += 1
+            if base.orth == extra.orth:
+                stats.reject("same word")
+                continue
+            stats.count("pairs tried")
+            bases.append(base)
+
+        # Count the nouns that were skipped by the index of first vowels.
+        skipped = self._count_nouns() - candidates
+        stats.reject("first vowel (index)", skipped)
+        return bases
+
+    def iter_riddles_for_extra(self, extra: Lemma) -> Iterator[Riddle]:
+        """Generate all riddles that use `extra` as the extra word."""
+        for base in self._list_bases(extra):
+            riddle = self.make_riddle(base, extra)
+            if riddle:
+                yield riddle
+
+    def iter_riddles_for_base(self, base: Lemma) -> Iterator[Riddle]:
+        """Generate all riddles that use `base` as the base word."""
+        for extra in self.dict.iter_extras(base):
+            if extra.orth != base.orth:
+                if stats.enabled:
+                    stats.count("pairs tried")
+                riddle = self.make_riddle(base, extra)
+                if riddle:
+                    yield riddle
+
+    def find_partners(self, word: Union[Lemma, str]) -> List[Riddle]:
+        """Return all riddles that use `word` as the base or as the extra word.
+
+        A string is looked up in the dictionary and raises `KeyError` if it is
+        not found. The riddles of dictionary words are cached.
+        """
+        if isinstance(word, str):
+            lemma = self.dict.lookup(word)
+            if lemma is None:
+                raise KeyError(word)
+            cacheable = True
+        else:
+            lemma = word
+            cacheable = self.dict.lookup(word.orth) is word
+
+        riddles = self.partner_cache.get(lemma.orth) if cacheable else None
+        if riddles is None:
+            riddles = tuple(
+                chain(
+                    self.iter_riddles_for_base(lemma),
+                    self.iter_riddles_for_extra(lemma),
+                )
+            )
+            if cacheable:
+                self.partner_cache.put(lemma.orth, riddles)
+
+        return list(riddles)
+
+    def update_lemma(self, s: str, lemma_dict: Dict[str, str]) -> Lemma:
+        """Add a word to the dictionary or replace its entry.
+
+        The cached riddles are dropped since they may involve the word.
+        """
+        lemma = self.dict.update(s, lemma_dict)
+        self.partner_cache.clear()
+        self._pairs = None
+        self._noun_count = None
+        return lemma
+
+    def _count_nouns(self) -> int:
+        """Return the number of nouns in the dictionary."""
+        if self._noun_count is None:
+            self._noun_count = sum(1 for _ in self.dict.iter_nouns())
+        return self._noun_count
+
+    def iter_riddles(
+        self, processes: Optional[int] = 1, vectorized: bool = False
+    ) -> Iterator[Riddle]:
+        """Lazily generate all riddles based on the current dictionary.
+
+        If `processes` is not 1, the work is split across that many worker
+        processes (`None` uses one process per CPU). With `vectorized`, the
+        words are compared in blocks using NumPy instead.
+        """
+        if vectorized:
+            with stats.timer("vectorized encoding"):
+                engine = VectorizedEngine(self.dict)
+            for base, extra, compound in engine.iter_compounds():
+                yield self._build_riddle(base, extra, compound)
+            return
+
+        if processes == 1:
+            for extra in self.dict:
+                yield from self.iter_riddles_for_extra(extra)
+            return
+
+        # Split the extra words into chunks that are handed out to the workers.
+        # `map` returns the results in the order of the chunks so that the
+        # riddles come out in the same order as in a serial run.
+        orths = self._list_orths()
+        workers = processes or os.cpu_count() or 1
+        chunk_size = max(1, len(orths) // (workers * 4))
+        chunks = []
+        for start in range(0, len(orths), chunk_size):
+            end = start + chunk_size
+            chunks.append(orths[start:end])
+
+        with ProcessPoolExecutor(processes) as executor:
+            results = executor.map(
+                _generate_chunk,
+                repeat(self.dict_path),
+                chunks,
+                repeat(stats.enabled),
+                repeat(list(near_matches)),
+            )
+            for riddles, worker_stats in results:
+                if worker_stats:
+                    stats.update(worker_stats)
+                yield from riddles
+
+    async def agenerate(
+        self,
+        executor: Optional[Executor] = None,
+        chunk_size: int = 64,
+        queue_size: int = 1024,
+        pending: int = 2,
+    ) -> AsyncIterator[Riddle]:
+        """Asynchronously generate all riddles based on the current dictionary.
+
+        The extra words are split into chunks of `chunk_size` that are run in
+        `executor` (`None` uses the default executor of the event loop), with
+        at most `pending` chunks submitted at a time. The riddles are passed on
+        in the order of a serial run through a queue holding at most
+        `queue_size` riddles, so that no further chunks are submitted while the
+        consumer is behind. Worker processes of a `ProcessPoolExecutor` load the
+        dictionary from its file, so changes made by `update_lemma` are not
+        seen there.
+
+        Closing the iterator, which happens when it is left early or the
+        consuming task is cancelled, cancels the chunks that have not been
+        started yet. Call `aclose` to have this happen at once.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(queue_size)
+        in_process = isinstance(executor, ProcessPoolExecutor)
+        instrument = stats.enabled
+        pairs = list(near_matches)
+
+        def submit(orths: List[str]) -> asyncio.Future:
+            if in_process:
+                return loop.run_in_executor(
+                    executor, _generate_chunk, self.dict_path, orths, instrument, pairs
+                )
+            return loop.run_in_executor(executor, self._riddles_for_orths, orths)
+
+        async def produce() -> None:
+            futures: Deque[asyncio.Future] = deque()
+            try:
+                orths = await loop.run_in_executor(None, self._list_orths)
+                for start in range(0, len(orths), chunk_size):
+                    end = start + chunk_size
+                    futures.append(submit(orths[start:end]))
+                    if len(futures) >= pending:
+                        await self._put_chunk(queue, await futures.popleft())
+                while futures:
+                    await self._put_chunk(queue, await futures.popleft())
+            except Exception as error:
+                await queue.put(error)
+                return
+            finally:
+                for future in futures:
+                    future.cancel()
+            await queue.put(None)
+
+        producer = asyncio.ensure_future(produce())
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            producer.cancel()
+            with suppress(asyncio.CancelledError):
+                await producer
+
+    @staticmethod
+    async def _put_chunk(
+        queue: asyncio.Queue,
+        result: Union[List[Riddle], Tuple[List[Riddle], Optional[PipelineStats]]],
+    ) -> None:
+        """Put the riddles of a finished chunk into `queue`."""
+        if isinstance(result, tuple):
+            riddles, worker_stats = result
+            if worker_stats:
+                stats.update(worker_stats)
+        else:
+            riddles = result
+        for riddle in riddles:
+            await queue.put(riddle)
+
+    def _list_orths(self) -> List[str]:
+        """Return the spellings of all words in the dictionary."""
+        return [lemma.orth for lemma in self.dict]
+
+    def _riddles_for_orths(self, orths: List[str]) -> List[Riddle]:
+        """Return the riddles for the extra words spelled `orths`."""
+        riddles: List[Riddle] = []
+        for orth in orths:
+            extra = self.dict.lookup(orth)
+            if extra:
+                riddles.extend(self.iter_riddles_for_extra(extra))
+        return riddles
+
+    def iter_scored_riddles(self) -> Iterator[Tuple[MergeScore, Riddle]]:
+        """Lazily generate all riddles like `iter_riddles` with their scores."""
         for extra in self.dict:
-            for base in self.dict.iter_nouns():
-                if base.orth == extra.orth:
-                    continue
-                riddle = self.generate_riddle(base, extra)
+            for base in self._list_bases(extra):
+                result = base.merge_scored(extra)
+                if result:
+                    compound, score = result
+                    yield score, self._build_riddle(base, extra, compound)
+
+    def top_riddles(self, k: int) -> List[Tuple[MergeScore, Riddle]]:
+        """Return the `k` riddles with the best scores, best first.
+
+        Only a heap of `k` riddles is kept while all riddles are generated.
+        Riddles with equal scores keep the order in which they were generated.
+        """
+        return heapq.nlargest(
+            k, self.iter_scored_riddles(), key=lambda scored: scored[0].value
+        )
+
+    def sample_riddles(
+        self, n: int = 1, seed: Optional[int] = None, replace: bool = False
+    ) -> List[Riddle]:
+        """Return `n` riddles chosen uniformly at random from all riddles.
+
+        The riddles are sampled without replacement unless `replace` is set.
+        The same `seed` gives the same riddles for the same dictionary.
+        Raise `ValueError` if there are not enough riddles.
+        """
+        pairs = self._get_pairs()
+        count = len(pairs) // 2
+        rng = random.Random(seed)
+
+        if replace:
+            if count == 0 and n > 0:
+                raise ValueError("cannot sample from an empty set of riddles")
+            indices = [rng.randrange(count) for _ in range(n)]
+        else:
+            indices = rng.sample(range(count), n)
+
+        riddles = []
+        for i in indices:
+            extra = self.dict.lookup(self._orths[pairs[2 * i]])
+            base = self.dict.lookup(self._orths[pairs[2 * i + 1]])
+            if base and extra:
+                riddle = self.make_riddle(base, extra)
                 if riddle:
-                    print(riddle + "\n")
-                    riddle_counter += 1
+                    riddles.append(riddle)
+        return riddles
+
+    def _get_pairs(self) -> array:
+        """Return the positions of all valid pairs of extra and base words."""
+        if self._pairs is None:
+            self._orths = [lemma.orth for lemma in self.dict]
+            positions = {orth: i for i, orth in enumerate(self._orths)}
+
+            pairs = array("I")
+            for i, extra in enumerate(self.dict):
+                for base in self._list_bases(extra):
+                    if base.merge(extra):
+                        pairs.append(i)
+                        pairs.append(positions[base.orth])
+            self._pairs = pairs
+
+        return self._pairs
+
+    def iter_overlap_riddles(self) -> Iterator[Riddle]:
+        """Lazily generate riddles from overlaps at later vowels of the base.
+
+        `iter_riddles` only aligns the first full vowels of two words. This
+        finds the riddles where the extra word is aligned with any later full
+        vowel of the base instead.
+        """
+        with stats.timer("overlap index"):
+            index = OverlapIndex(self.dict)
+        for extra in self.dict:
+            for base, offset in index.find(extra):
+                # Every alignment is tried like a pair of its own.
+                if stats.enabled:
+                    stats.count("pairs tried")
+                compound = base.merge_at(extra, offset)
+                if compound:
+                    yield self._build_riddle(base, extra, compound)
+
+    def iter_fuzzy_riddles(self, budget: int = 2) -> Iterator[Riddle]:
+        """Lazily generate the riddles that are only found by fuzzy matching.
+
+        These are the pairs that `iter_riddles` rejects, but that match if
+        weak sounds may be left out at a total cost of at most `budget`.
+        """
+        for extra in self.dict:
+            for base in self._list_bases(extra):
+                if base.merge(extra):
+                    continue
+                # The rejected pair is tried again with fuzzy matching.
+                if stats.enabled:
+                    stats.count("pairs tried")
+                compound = base.merge_fuzzy(extra, budget)
+                if compound:
+                    yield self._build_riddle(base, extra, compound)
+
+    def iter_all_riddles(
+        self,
+        processes: Optional[int] = 1,
+        vectorized: bool = False,
+        overlaps: bool = False,
+        fuzzy: bool = False,
+    ) -> Iterator[Riddle]:
+        """Lazily generate all riddles, including the additional kinds requested."""
+        riddles = self.iter_riddles(processes, vectorized)
+        if overlaps:
+            riddles = chain(riddles, self.iter_overlap_riddles())
+        if fuzzy:
+            riddles = chain(riddles, self.iter_fuzzy_riddles())
+        return riddles
+
+    def generate_all(
+        self,
+        processes: Optional[int] = 1,
+        vectorized: bool = False,
+        overlaps: bool = False,
+        fuzzy: bool = False,
+    ) -> None:
+        """Print all possible riddles based on the current dictionary."""
+        riddles = self.iter_all_riddles(processes, vectorized, overlaps, fuzzy)
+
+        with stats.timer("generate all"):
+            self.print_riddles(riddles)
+
+    def print_riddles(self, riddles: Iterable[Riddle]) -> None:
+        """Print riddles followed by their number."""
+        riddle_counter = 0
+        for riddle in riddles:
+            print(str(riddle) + "\n")
+            riddle_counter += 1
 
         print("{} riddles were generated.\n".format(riddle_counter))
+
+    def show_stats(self) -> None:
+        """Print statistics about the dictionary and, if enabled, the pipeline."""
+        self.dict.show_stats()
+        if stats.enabled:
+            stats.show()
+
+
+def format_question(
+    color: Optional[str],
+    base_property: Optional[str],
+    extra_property: Optional[str],
+    base_action: Optional[str],
+    extra_action: Optional[str],
+) -> str:
+    """Format the question of a riddle from the properties of its words."""
+    is_properties: List[Optional[str]] = []
+
+    # If a color is specified, it should be mentioned first in the question.
+    if color:
+        is_properties.append(color)
+
+    # Add additional properties.
+    is_properties.append(base_property)
+    is_properties.append(extra_property)
+    props = [prop for prop in is_properties if prop is not None]
+
+    # Add actions.
+    actions = [prop for prop in [base_action, extra_action] if prop is not None]
+
+    all_props = props + actions
+    predicates = ", ".join(all_props[:-1])
+
+    # Add a copula verb if there are properties that are adjectives.
+    if props:
+        predicates = "ist {}".format(predicates)
+
+    q = "Was {} und {}?".format(predicates, all_props[-1])
+
+    return q
+
+
+def format_answer(determiner: Optional[str], compound: str) -> Optional[str]:
+    """Format the answer of a riddle from the determiner and the compound."""
+    if determiner:
+        a = str.format("{} {}.", determiner.capitalize(), compound)
+        return a
+    return None
+
+
+# Generators of the worker processes, loaded once per process and dictionary.
+_worker_generators: Dict[Path, Generator] = {}
+
+
+def _generate_chunk(
+    dict_path: Path,
+    orths: List[str],
+    instrument: bool = False,
+    pairs: Optional[List[Tuple[str, str]]] = None,
+) -> Tuple[List[Riddle], Optional[PipelineStats]]:
+    """Generate the riddles for a chunk of extra words in a worker process.
+
+    If `instrument` is set, the statistics collected for the chunk are
+    returned as well. `pairs` are the near matches of the parent process.
+    """
+    stats.enabled = instrument
+    stats.reset()
+
+    # Dictionaries loaded with other near matches have outdated indexes.
+    if pairs is not None and pairs != near_matches:
+        set_near_matches(pairs)
+        _worker_generators.clear()
+
+    gen = _worker_generators.get(dict_path)
+    if gen is None:
+        gen = _worker_generators[dict_path] = Generator(dict_path)
+
+    return gen._riddles_for_orths(orths), stats if instrument else None
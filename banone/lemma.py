@@ -1,8 +1,13 @@
 """Module providing the Lemma class."""
+import struct
+import sys
+
 from typing import Dict
+from typing import Iterable
 from typing import Optional
 from typing import Tuple
 
+from banone.sound import MergeScore
 from banone.sound import SoundSequence
 
 
@@ -17,29 +22,86 @@ def remove_last_syllable(phon: str) -> str:
     return phon[:i] + phon[j:]
 
 
+# Size of the packed sounds of a lemma, followed by those of its stem.
+packed_size = struct.Struct("<H")
+
+
+def intern(value: Optional[str]) -> Optional[str]:
+    """Return a shared instance of a string that is repeated across lemmas."""
+    if value is None:
+        return None
+    return sys.intern(value)
+
+
 class Lemma:
     """A lemma as it is found in the dictionary."""
 
+    __slots__ = (
+        "orth",
+        "phon",
+        "pos",
+        "determiner",
+        "color",
+        "property",
+        "action",
+        "_stem",
+        "_sound_seq",
+        "_stem_sound_seq",
+    )
+
     def __init__(self, orth: str, lemma_dict: Dict[str, str] = {}) -> None:
         """Initialize lemma from a dictionary entry."""
         self.orth = orth
-        self.phon = lemma_dict.get("phon") or orth.lower()
-        self.pos = lemma_dict.get("pos")
-        self.determiner = lemma_dict.get("determiner")
-        self.color = lemma_dict.get("color")
-        self.property = lemma_dict.get("property")
-        self.action = lemma_dict.get("action")
+        self._set_fields(lemma_dict)
+
+    def _set_fields(self, lemma_dict: Dict[str, str]) -> None:
+        """Set the fields of the lemma and drop the data derived from them."""
+        self.phon = lemma_dict.get("phon") or self.orth.lower()
+        self.pos = intern(lemma_dict.get("pos"))
+        self.determiner = intern(lemma_dict.get("determiner"))
+        self.color = intern(lemma_dict.get("color"))
+        self.property = intern(lemma_dict.get("property"))
+        self.action = intern(lemma_dict.get("action"))
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        """Drop the derived data so that it is computed again on next use."""
+        self._stem: Optional[Tuple[str, str]] = None
+        self._sound_seq: Optional[SoundSequence] = None
+        self._stem_sound_seq: Optional[SoundSequence] = None
+
+    def update(self, lemma_dict: Dict[str, str]) -> None:
+        """Replace the dictionary entry of the lemma and drop the derived data."""
+        self._set_fields(lemma_dict)
 
     def __str__(self) -> str:
         """Return the string representation of the lemma."""
         return self.orth
 
+    def to_dict(self) -> Dict[str, str]:
+        """Return the dictionary entry the lemma can be recreated from."""
+        fields = {
+            "phon": self.phon,
+            "pos": self.pos,
+            "determiner": self.determiner,
+            "color": self.color,
+            "property": self.property,
+            "action": self.action,
+        }
+        return {key: value for key, value in fields.items() if value is not None}
+
     def get_stem(self) -> Tuple[str, str]:
         """Get the stem of the lemma.
 
         "Stem" for our purposes is the part of a word that can be used for
         pun compound creation.
         """
+        if self._stem is None:
+            self._stem = self._find_stem()
+        return self._stem
+
+    def _find_stem(self) -> Tuple[str, str]:
+        """Derive the stem from the phonetic and orthographic representation."""
         phon, orth = self.phon, self.orth
 
         # Remove schwa sound from the end of a noun ("Fahne" becomes "Fahn").
@@ -58,12 +120,52 @@ class Lemma:
         # Default: The stem is simply the full lemma.
         return phon, orth
 
+    def get_sound_sequence(self) -> SoundSequence:
+        """Return the sound sequence of the full lemma."""
+        if self._sound_seq is None:
+            self._sound_seq = SoundSequence(self.orth, self.phon)
+        return self._sound_seq
+
+    def get_stem_sound_sequence(self) -> SoundSequence:
+        """Return the sound sequence of the stem of the lemma."""
+        if self._stem_sound_seq is None:
+            phon, orth = self.get_stem()
+            self._stem_sound_seq = SoundSequence(orth, phon)
+        return self._stem_sound_seq
+
+    def parse(self) -> None:
+        """Parse the sounds of the lemma and its stem in advance."""
+        self.get_sound_sequence()
+        self.get_stem_sound_sequence()
+
+    def pack_sounds(self) -> bytes:
+        """Return the parsed sounds of the lemma and its stem for `unpack_sounds`.
+
+        The sounds of the stem are left out if they are the same.
+        """
+        sound_seq = self.get_sound_sequence().pack()
+        stem_sound_seq = b""
+        if self.get_stem() != (self.phon, self.orth):
+            stem_sound_seq = self.get_stem_sound_sequence().pack()
+        return packed_size.pack(len(sound_seq)) + sound_seq + stem_sound_seq
+
+    def unpack_sounds(self, data: bytes) -> None:
+        """Restore the sounds returned by `pack_sounds` without parsing them."""
+        (size,) = packed_size.unpack_from(data)
+        start = packed_size.size
+        end = start + size
+        self._sound_seq = SoundSequence.unpack(self.orth, self.phon, data[start:end])
+
+        if end == len(data):
+            self._stem_sound_seq = self._sound_seq
+        else:
+            phon, orth = self.get_stem()
+            self._stem_sound_seq = SoundSequence.unpack(orth, phon, data[end:])
+
     def merge(self, other: "Lemma") -> Optional["Lemma"]:
         """Merge another lemma into this one to form a compound."""
-        sound_seq_base = SoundSequence(self.orth, self.phon)
-
-        phon, orth = other.get_stem()
-        sound_seq_extra = SoundSequence(orth, phon)
+        sound_seq_base = self.get_sound_sequence()
+        sound_seq_extra = other.get_stem_sound_sequence()
 
         compound_orth = sound_seq_base.merge(sound_seq_extra)
 
@@ -71,3 +173,65 @@ class Lemma:
             return Lemma(compound_orth)
 
         return None
+
+    def merge_scored(self, other: "Lemma") -> Optional[Tuple["Lemma", MergeScore]]:
+        """Merge another lemma into this one and score the compound."""
+        sound_seq_base = self.get_sound_sequence()
+        sound_seq_extra = other.get_stem_sound_sequence()
+
+        result = sound_seq_base.merge_scored(sound_seq_extra)
+
+        if result:
+            compound_orth, score = result
+            # The base may keep the ending the stem of `other` leaves out, as in
+            # "Vandale" + "Randal(e)" = "Randale".
+            if compound_orth.lower() == other.orth.lower():
+                score = score._replace(is_extra=True)
+            return Lemma(compound_orth), score
+
+        return None
+
+    def merge_fuzzy(self, other: "Lemma", budget: int = 2) -> Optional["Lemma"]:
+        """Merge another lemma into this one, allowing weak sounds to be left out."""
+        sound_seq_base = self.get_sound_sequence()
+        sound_seq_extra = other.get_stem_sound_sequence()
+
+        compound_orth = sound_seq_base.merge_fuzzy(sound_seq_extra, budget)
+
+        if compound_orth:
+            return Lemma(compound_orth)
+
+        return None
+
+    def merge_at(self, other: "Lemma", offset: int) -> Optional["Lemma"]:
+        """Merge another lemma into this one, aligned at the sound at `offset`."""
+        sound_seq_base = self.get_sound_sequence()
+        sound_seq_extra = other.get_stem_sound_sequence()
+
+        compound_orth = sound_seq_base.merge_at(sound_seq_extra, offset)
+
+        if compound_orth:
+            return Lemma(compound_orth)
+
+        return None
+
+
+def parse_lemmas(lemmas: Iterable[Lemma]) -> None:
+    """Parse the sounds of many lemmas and their stems at once.
+
+    Words with the same spelling and pronunciation share one sound sequence,
+    e.g. a lemma and its stem if they are the same.
+    """
+    sequences: Dict[Tuple[str, str], SoundSequence] = {}
+
+    def get_sequence(orth: str, phon: str) -> SoundSequence:
+        key = (orth, phon)
+        sequence = sequences.get(key)
+        if sequence is None:
+            sequence = sequences[key] = SoundSequence(orth, phon)
+        return sequence
+
+    for lemma in lemmas:
+        lemma._sound_seq = get_sequence(lemma.orth, lemma.phon)
+        phon, orth = lemma.get_stem()
+        lemma._stem_sound_seq = get_sequence(orth, phon)
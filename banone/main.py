@@ -1,13 +1,163 @@
 """Main module."""
+import argparse
+import sys
+from contextlib import redirect_stdout
 from pathlib import Path
 
+from typing import Iterable
+
+from banone.database import RiddleDatabase
+from banone.dictionary import compile_mapped
 from banone.generator import Generator
+from banone.generator import Riddle
+from banone.sinks import open_sink
+from banone.sinks import sink_types
+from banone.stats import stats
+from banone.store import ResultStore
+
+default_dict_path = Path(__file__).resolve().parent.joinpath("dict/de.yaml")
 
 
 def main() -> None:
     """Run the banone generator and show some statistics."""
-    dict_path = Path(__file__).resolve().parent.joinpath("dict/de.yaml")
-    gen = Generator(dict_path)
+    parser = argparse.ArgumentParser(description="Generate joke riddles.")
+    parser.add_argument(
+        "-d",
+        "--dictionary",
+        type=Path,
+        default=default_dict_path,
+        help="YAML dictionary or compiled .lex file",
+    )
+    parser.add_argument(
+        "-j",
+        "--processes",
+        type=int,
+        default=1,
+        help="number of worker processes (0: one per CPU)",
+    )
+    parser.add_argument(
+        "--vectorized",
+        action="store_true",
+        help="compare the words in blocks using NumPy",
+    )
+    parser.add_argument(
+        "--overlaps",
+        action="store_true",
+        help="also align the extra words with later vowels of the base words",
+    )
+    parser.add_argument(
+        "--fuzzy",
+        action="store_true",
+        help="also match words if a schwa or vocalic r has to be left out",
+    )
+    # Modes that select the riddles in their own way, without the options of
+    # the full generation above.
+    modes = parser.add_mutually_exclusive_group()
+    modes.add_argument(
+        "--top",
+        type=int,
+        metavar="K",
+        help="only print the K riddles with the best scores",
+    )
+    modes.add_argument(
+        "--sample",
+        type=int,
+        metavar="N",
+        help="only print N riddles chosen at random",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        help="seed for choosing the riddles with --sample",
+    )
+    parser.add_argument(
+        "--format",
+        choices=sorted(sink_types) + ["sqlite"],
+        default="text",
+        help="output format of the riddles (sqlite requires --output)",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        help="write the riddles to this file (compressed if it ends in .gz)",
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="count rejected pairs and measure the stages of the generation",
+    )
+    modes.add_argument(
+        "--store",
+        type=Path,
+        help="reuse the riddles stored in this file and only evaluate changed words",
+    )
+    args = parser.parse_args()
+    if args.format == "sqlite" and args.output is None:
+        parser.error("--format sqlite requires --output")
+    if args.seed is not None and args.sample is None:
+        parser.error("--seed requires --sample")
+    if args.vectorized and args.processes != 1:
+        parser.error("--vectorized cannot be combined with -j/--processes")
+
+    generation_options = {
+        "-j/--processes": args.processes != 1,
+        "--vectorized": args.vectorized,
+        "--overlaps": args.overlaps,
+        "--fuzzy": args.fuzzy,
+    }
+    for mode in ("store", "sample", "top"):
+        if getattr(args, mode) is None:
+            continue
+        for option, given in generation_options.items():
+            if given:
+                parser.error("--{} cannot be combined with {}".format(mode, option))
+
+    stats.enabled = args.stats
+    gen = Generator(args.dictionary)
+
+    # The selection modes build their riddles at once, so they are timed too.
+    with stats.timer("generate all"):
+        riddles: Iterable[Riddle]
+        if args.store:
+            riddles = ResultStore(args.store).update(gen)
+        elif args.sample is not None:
+            riddles = gen.sample_riddles(args.sample, seed=args.seed)
+        elif args.top is not None:
+            riddles = [riddle for _, riddle in gen.top_riddles(args.top)]
+        else:
+            riddles = gen.iter_all_riddles(
+                processes=args.processes or None,
+                vectorized=args.vectorized,
+                overlaps=args.overlaps,
+                fuzzy=args.fuzzy,
+            )
+
+        if args.format == "text" and args.output is None:
+            gen.print_riddles(riddles)
+        elif args.format == "sqlite":
+            with RiddleDatabase(args.output) as database:
+                count = database.add_riddles(riddles, gen.dict)
+            print("{} riddles were generated.".format(count), file=sys.stderr)
+        else:
+            # Keep the summary out of the structured output.
+            with open_sink(args.format, args.output) as sink:
+                count = sink.write_all(riddles)
+            print("{} riddles were generated.".format(count), file=sys.stderr)
+
+    # Keep the statistics out of structured output on stdout.
+    if args.format != "text" and args.output is None:
+        with redirect_stdout(sys.stderr):
+            gen.show_stats()
+    else:
+        gen.show_stats()
+
+
+def compile_dictionary() -> None:
+    """Compile a YAML dictionary into a memory-mapped .lex file."""
+    parser = argparse.ArgumentParser(description="Compile a dictionary.")
+    parser.add_argument("source", type=Path, help="YAML dictionary")
+    parser.add_argument("target", type=Path, help="compiled .lex file")
+    args = parser.parse_args()
 
-    gen.generate_all()
-    gen.dict.show_stats()
+    compile_mapped(args.source, args.target)
@@ -0,0 +1,84 @@
+"""Module providing an index for finding overlaps of words at any offset."""
+import sys
+from bisect import bisect_left
+from bisect import bisect_right
+
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Tuple
+
+from banone.dictionary import Dictionary
+from banone.lemma import Lemma
+from banone.sound import SoundSequence
+from banone.sound import get_sound_class
+
+
+class OverlapIndex:
+    """Suffix array over the sounds of all nouns.
+
+    `SoundSequence.merge` only aligns the first full vowels of two words. The
+    index finds all later full vowels of a base word that an extra word can be
+    aligned with. For this, the sounds are mapped to their sound classes: two
+    sounds can only match if they belong to the same class, so all matches can
+    be found by binary search on the sorted suffixes. The candidates are then
+    checked with the actual distance rules in `SoundSequence.merge_at`.
+    """
+
+    def __init__(self, dictionary: Dictionary) -> None:
+        """Build the suffix array for the nouns of the dictionary."""
+        self.bases = list(dictionary.iter_nouns())
+        self.class_ids: Dict[str, int] = {}
+
+        suffixes = []
+        for number, base in enumerate(self.bases):
+            seq = base.get_sound_sequence()
+            classes = self._encode(seq, 0)
+            for offset in range(seq.start_index + 1, len(seq)):
+                if seq.full_vowels[offset]:
+                    suffixes.append((classes[offset:], number, offset))
+        suffixes.sort()
+
+        self.keys = [key for key, _, _ in suffixes]
+        self.positions = [(number, offset) for _, number, offset in suffixes]
+
+    def _encode(self, seq: SoundSequence, start: int) -> Tuple[int, ...]:
+        """Return the sound classes of the sounds from `start` on as integers."""
+        ids = []
+        for sound in seq.sounds[start:]:
+            sound_class = get_sound_class(sound.phone)
+            class_id = self.class_ids.setdefault(sound_class, len(self.class_ids))
+            ids.append(class_id)
+        return tuple(ids)
+
+    def find(self, extra: Lemma) -> Iterator[Tuple[Lemma, int]]:
+        """Find bases and offsets after their first full vowel that `extra` fits.
+
+        The candidates are sorted by base and offset.
+        """
+        seq = extra.get_stem_sound_sequence()
+        pattern = self._encode(seq, seq.start_index)
+        if not pattern:
+            return
+
+        # Suffixes that start with the whole extra word.
+        lo = bisect_left(self.keys, pattern)
+        hi = bisect_left(self.keys, pattern + (sys.maxsize,))
+        ranges = [(lo, hi)]
+
+        # Suffixes at the end of a base word that are shorter than the extra word.
+        for size in range(1, len(pattern)):
+            prefix = pattern[:size]
+            lo = bisect_left(self.keys, prefix)
+            hi = bisect_right(self.keys, prefix)
+            ranges.append((lo, hi))
+
+        positions: List[Tuple[int, int]] = []
+        for lo, hi in ranges:
+            positions.extend(self.positions[lo:hi])
+
+        for number, offset in sorted(positions):
+            base = self.bases[number]
+            if base.orth == extra.orth:
+                continue
+            yield base, offset
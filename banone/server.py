@@ -0,0 +1,165 @@
+"""Module providing a long-running server for joke riddles.
+
+The server loads the dictionary and generates the riddles once, then answers
+requests given as JSON lines, either on stdin/stdout or on a Unix socket.
+
+Requests:
+* `{"cmd": "random"}`: one random riddle
+* `{"cmd": "word", "word": "Banane"}`: all riddles with the word as base or extra
+* `{"cmd": "top", "k": 5}`: the `k` best riddles with their scores, up to the
+  number of best riddles the server keeps
+
+An optional `"id"` is copied into the response so that clients can match
+responses to requests, which may be answered out of order.
+"""
+import argparse
+import json
+import socketserver
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from typing import Any
+from typing import Dict
+from typing import TextIO
+
+from banone.generator import Generator
+
+
+class RiddleServer:
+    """Answers riddle requests from a generator that is kept in memory."""
+
+    def __init__(self, gen: Generator, max_top: int = 100) -> None:
+        """Find the `max_top` best riddles and all valid pairs of words.
+
+        Only the best riddles and the compact list of pairs random riddles
+        are sampled from are kept, not all riddles.
+        """
+        self.gen = gen
+        self.ranked = gen.top_riddles(max_top)
+        # Collect the pairs now instead of on the first random request.
+        gen.sample_riddles(0)
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Answer a single request."""
+        cmd = request.get("cmd")
+        response: Dict[str, Any]
+
+        if cmd == "random":
+            try:
+                response = {"riddle": self.gen.sample_riddles(1)[0]._asdict()}
+            except (ValueError, IndexError):
+                response = {"error": "no riddles"}
+        elif cmd == "word":
+            try:
+                riddles = self.gen.find_partners(str(request.get("word")))
+                response = {"riddles": [riddle._asdict() for riddle in riddles]}
+            except KeyError:
+                response = {"error": "unknown word: {}".format(request.get("word"))}
+        elif cmd == "top":
+            k = request.get("k", 1)
+            if isinstance(k, int) and not isinstance(k, bool) and k >= 0:
+                response = {
+                    "riddles": [
+                        dict(riddle._asdict(), score=score._asdict())
+                        for score, riddle in self.ranked[:k]
+                    ]
+                }
+            else:
+                response = {"error": "k must be a non-negative integer"}
+        else:
+            response = {"error": "unknown command: {}".format(cmd)}
+
+        if "id" in request:
+            response["id"] = request["id"]
+        return response
+
+    def handle_line(self, line: str) -> str:
+        """Answer a request given as a JSON line.
+
+        Any error is answered with an error response, so that no request is
+        left without an answer.
+        """
+        request: Any = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+            response = self.handle(request)
+        except Exception as e:
+            response = {"error": str(e) or type(e).__name__}
+            if isinstance(request, dict) and "id" in request:
+                response["id"] = request["id"]
+        return json.dumps(response, ensure_ascii=False)
+
+    def serve_stdio(
+        self, infile: TextIO = sys.stdin, outfile: TextIO = sys.stdout, workers: int = 4
+    ) -> None:
+        """Answer requests from `infile` concurrently until it is closed."""
+        lock = threading.Lock()
+
+        def answer(line: str) -> None:
+            response = self.handle_line(line)
+            with lock:
+                outfile.write(response + "\n")
+                outfile.flush()
+
+        with ThreadPoolExecutor(workers) as executor:
+            for line in infile:
+                if line.strip():
+                    executor.submit(answer, line)
+
+    def serve_unix(self, path: Path) -> None:
+        """Answer requests on a Unix socket, one thread per connection.
+
+        A socket file left behind at `path` by an earlier run is replaced, and
+        the socket file is removed when the server stops.
+        """
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self) -> None:
+                for line in self.rfile:
+                    if line.strip():
+                        response = server.handle_line(line.decode("utf-8"))
+                        self.wfile.write(response.encode("utf-8") + b"\n")
+
+        if path.is_socket():
+            path.unlink()
+
+        try:
+            with socketserver.ThreadingUnixStreamServer(str(path), Handler) as unix:
+                unix.serve_forever()
+        finally:
+            if path.is_socket():
+                path.unlink()
+
+
+def main() -> None:
+    """Run the riddle server."""
+    parser = argparse.ArgumentParser(description="Serve joke riddles.")
+    parser.add_argument(
+        "-d",
+        "--dictionary",
+        type=Path,
+        default=Path(__file__).resolve().parent.joinpath("dict/de.yaml"),
+        help="YAML dictionary or compiled .lex file",
+    )
+    parser.add_argument(
+        "--socket", type=Path, help="listen on this Unix socket instead of stdin"
+    )
+    parser.add_argument(
+        "--max-top",
+        type=int,
+        default=100,
+        metavar="K",
+        help="number of best riddles kept for top requests (default: %(default)s)",
+    )
+    args = parser.parse_args()
+
+    server = RiddleServer(Generator(args.dictionary), args.max_top)
+    if args.socket:
+        server.serve_unix(args.socket)
+    else:
+        server.serve_stdio()
@@ -0,0 +1,112 @@
+"""Module providing outputs that riddles can be written to in bulk."""
+import csv
+import gzip
+import io
+import json
+import sys
+from abc import ABC
+from abc import abstractmethod
+from pathlib import Path
+
+from typing import Dict
+from typing import Iterable
+from typing import Optional
+from typing import TextIO
+from typing import Type
+
+from banone.generator import Riddle
+
+# Size of the write buffers, large enough to write millions of riddles quickly.
+BUFFER_SIZE = 1 << 20
+
+
+class RiddleSink(ABC):
+    """Base class of the outputs that riddles can be written to."""
+
+    def __init__(self, file: TextIO, close_file: bool = True) -> None:
+        """Write riddles to `file`, which is closed with the sink if requested."""
+        self.file = file
+        self.close_file = close_file
+
+    def __enter__(self) -> "RiddleSink":
+        """Return the sink itself."""
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        """Close the sink."""
+        self.close()
+
+    @abstractmethod
+    def write(self, riddle: Riddle) -> None:
+        """Write a single riddle."""
+
+    def write_all(self, riddles: Iterable[Riddle]) -> int:
+        """Write all riddles and return their number."""
+        count = 0
+        for riddle in riddles:
+            self.write(riddle)
+            count += 1
+        return count
+
+    def close(self) -> None:
+        """Flush the written riddles and close the file if it is owned."""
+        if self.close_file:
+            self.file.close()
+        else:
+            self.file.flush()
+
+
+class TextSink(RiddleSink):
+    """Writes riddles as question and answer followed by an empty line."""
+
+    def write(self, riddle: Riddle) -> None:
+        """Write a single riddle."""
+        self.file.write(str(riddle) + "\n\n")
+
+
+class JsonlSink(RiddleSink):
+    """Writes riddles as JSON objects, one per line."""
+
+    def write(self, riddle: Riddle) -> None:
+        """Write a single riddle."""
+        self.file.write(json.dumps(riddle._asdict(), ensure_ascii=False) + "\n")
+
+
+class CsvSink(RiddleSink):
+    """Writes riddles as CSV rows below a header row."""
+
+    def __init__(self, file: TextIO, close_file: bool = True) -> None:
+        """Write riddles to `file` and start with the header row."""
+        super().__init__(file, close_file)
+        self.writer = csv.writer(file, lineterminator="\n")
+        self.writer.writerow(Riddle._fields)
+
+    def write(self, riddle: Riddle) -> None:
+        """Write a single riddle."""
+        self.writer.writerow(riddle)
+
+
+sink_types: Dict[str, Type[RiddleSink]] = {
+    "text": TextSink,
+    "jsonl": JsonlSink,
+    "csv": CsvSink,
+}
+
+
+def open_sink(fmt: str, path: Optional[Path] = None) -> RiddleSink:
+    """Open a sink of the format `fmt` writing to `path` or to stdout.
+
+    Files with the suffix `.gz` are compressed with gzip.
+    """
+    sink_type = sink_types[fmt]
+
+    if path is None:
+        return sink_type(sys.stdout, close_file=False)
+
+    if path.suffix == ".gz":
+        raw = io.BufferedWriter(gzip.GzipFile(path, "wb"), BUFFER_SIZE)
+        file: TextIO = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+    else:
+        file = path.open("w", encoding="utf-8", newline="", buffering=BUFFER_SIZE)
+
+    return sink_type(file)
@@ -1,13 +1,159 @@
 """Module providing classes to handle the phonetic representations of words."""
 import re
+import struct
+from array import array
 
-from typing import Iterator
+from typing import Dict
 from typing import List
 from typing import NamedTuple
 from typing import Optional
+from typing import Tuple
+from typing import cast
+
+from banone.stats import stats
 
 re_full_vowels = re.compile("^[aeiouy29]", re.I)
 
+# All phones that can be found by `SoundSequence.re_sounds`. They are interned
+# in this order so that their IDs are the same in every process.
+phone_inventory = """
+    pf ts tS dZ p b t d k g f v s z S Z C j x h m n N l R aI aU OY
+    i i: e e: E E: a a: o o: u u: y y: 2 2: I O U Y 9 @ 6
+""".split()
+
+# Pairs of phones that can be matched with each other at a larger distance.
+# Use `set_near_matches` to change them.
+near_matches = [("m", "n"), ("l", "R"), ("p", "pf")]
+
+# Weak sounds that may be left out when words are matched with `merge_fuzzy`.
+weak_phones = ("@", "6")
+
+
+def get_sound_classes(pairs: List[Tuple[str, str]]) -> Dict[str, str]:
+    """Map phones that can be matched with each other to a common class.
+
+    Long and short vowels are not told apart, and chained pairs such as
+    `("m", "n")` and `("n", "N")` put all three phones into one class. Phones
+    that are only matched with themselves are left out.
+    """
+    parents: Dict[str, str] = {}
+
+    def find(phone: str) -> str:
+        while parents.get(phone, phone) != phone:
+            phone = parents[phone]
+        return phone
+
+    for first, second in pairs:
+        root1, root2 = find(first.rstrip(":")), find(second.rstrip(":"))
+        if root1 != root2:
+            parents[root2] = root1
+
+    return {phone: find(phone) for phone in parents}
+
+
+# Phones that can be matched with each other are mapped to a common class.
+sound_classes = get_sound_classes(near_matches)
+
+
+def get_sound_class(phone: str) -> str:
+    """Return a representative of all phones that can be matched with `phone`.
+
+    Long and short vowels such as "a:" and "a" fall into the same class.
+    """
+    phone = phone.rstrip(":")
+    return sound_classes.get(phone, phone)
+
+
+class PhoneTable:
+    """Interned phones with precomputed properties and distances.
+
+    Each phone is mapped to a small integer ID. A sound is encoded as
+    `2 * id + stressed`, and the distance between two encoded sounds is looked
+    up in a matrix that covers all interned phones.
+    """
+
+    def __init__(self, phones: List[str], near_matches: List[Tuple[str, str]]) -> None:
+        """Intern the given phones and compute their distances."""
+        self.near_matches = set(frozenset(pair) for pair in near_matches)
+        self.ids: Dict[str, int] = {}
+        self.phones: List[str] = []
+        self.full_vowels: List[bool] = []
+        self.distances: List[List[int]] = []
+
+        for phone in phones:
+            self.intern(phone)
+
+    def intern(self, phone: str) -> int:
+        """Return the ID of `phone`, adding it to the table if necessary."""
+        phone_id = self.ids.get(phone)
+        if phone_id is not None:
+            return phone_id
+
+        phone_id = len(self.phones)
+        self.ids[phone] = phone_id
+        self.phones.append(phone)
+        self.full_vowels.append(bool(re_full_vowels.match(phone)))
+
+        # Add the unstressed and the stressed sound to the distance matrix.
+        new_codes = [2 * phone_id, 2 * phone_id + 1]
+        for code, row in enumerate(self.distances):
+            row.extend(self._compute_distance(code, new) for new in new_codes)
+        size = 2 * len(self.phones)
+        for new in new_codes:
+            row = [self._compute_distance(new, code) for code in range(size)]
+            self.distances.append(row)
+
+        return phone_id
+
+    def set_near_matches(self, near_matches: List[Tuple[str, str]]) -> None:
+        """Replace the pairs of near matches and recompute all distances."""
+        self.near_matches = set(frozenset(pair) for pair in near_matches)
+        size = 2 * len(self.phones)
+        self.distances = [
+            [self._compute_distance(code1, code2) for code2 in range(size)]
+            for code1 in range(size)
+        ]
+
+    def encode(self, phone: str, stressed: bool) -> int:
+        """Return the code of a sound."""
+        return 2 * self.intern(phone) + stressed
+
+    def _compute_distance(self, code1: int, code2: int) -> int:
+        """Return a numerical distance between two encoded sounds."""
+        p1, p2 = self.phones[code1 // 2], self.phones[code2 // 2]
+        stressed1, stressed2 = code1 % 2, code2 % 2
+
+        if p1 == p2:
+            return 0
+
+        # Match long and short vowels such as "a" and "a:" but only if the short vowel
+        # is not stressed.
+        if (p1 == p2 + ":" and not stressed2) or (p2 == p1 + ":" and not stressed1):
+            return 1
+
+        # Allow for some additional matches that give a larger distance.
+        if frozenset([p1, p2]) in self.near_matches:
+            return 2
+
+        # The two sounds cannot be matched at all.
+        return 100
+
+
+phone_table = PhoneTable(phone_inventory, near_matches)
+
+
+def set_near_matches(pairs: List[Tuple[str, str]]) -> None:
+    """Set the pairs of phones that can be matched at a larger distance.
+
+    The distances in `phone_table` and the sound classes are changed for the
+    whole process. The indexes of a dictionary depend on the sound classes, so
+    dictionaries have to be loaded afterwards.
+    """
+    near_matches[:] = pairs
+    phone_table.set_near_matches(pairs)
+    sound_classes.clear()
+    sound_classes.update(get_sound_classes(pairs))
+
 
 class Sound(NamedTuple):
     """A sound that is part of a word."""
@@ -21,41 +167,118 @@ class Sound(NamedTuple):
         """Return the string representation of the sound."""
         return self.phone
 
+    def get_code(self) -> int:
+        """Return the code of the sound in the phone table."""
+        return phone_table.encode(self.phone, self.stressed)
+
     def is_full_vowel(self) -> bool:
         """Return `True` if the sound is a full vowel."""
-        if re_full_vowels.match(self.phone):
-            return True
-        return False
+        return phone_table.full_vowels[phone_table.intern(self.phone)]
 
     def get_distance(self, other: "Sound") -> int:
         """Return a numerical distance between this sound and another."""
-        p1, p2 = self.phone, other.phone
+        return phone_table.distances[self.get_code()][other.get_code()]
 
-        if p1 == p2:
-            return 0
 
-        # Match long and short vowels such as "a" and "a:" but only if the short vowel
-        # is not stressed.
-        if (p1 == p2 + ":" and not other.stressed) or (
-            p2 == p1 + ":" and not self.stressed
-        ):
-            return 1
+def compile_graphs(
+    phone_graph_map: Dict[str, List[str]]
+) -> Dict[str, Tuple[Tuple[str, int], ...]]:
+    """Return the graphs of every phone in the inventory with their lengths.
 
-        # Allow for some additional matches that give a larger distance.
-        if (
-            set([p1, p2]) == set(["m", "n"])
-            or set([p1, p2]) == set(["l", "R"])
-            or set([p1, p2]) == set(["pf", "p"])
-        ):
-            return 2
+    Phones without graphs in `phone_graph_map` are written as themselves.
+    """
+    return {
+        phone: tuple(
+            (graph, len(graph)) for graph in phone_graph_map.get(phone, [phone])
+        )
+        for phone in phone_inventory
+    }
 
-        # The two sounds cannot be matched at all.
-        return 100
+
+class MergeScore(NamedTuple):
+    """Measures of how well two words match in a compound."""
+
+    # Sum of the distances between the aligned sounds.
+    total_distance: int
+    # Number of aligned sounds.
+    overlap: int
+    # Whether the aligned first full vowels are both stressed or unstressed.
+    stressed_match: bool
+    # Number of syllables of the extra word divided by those of the base.
+    syllable_ratio: float
+    # Whether the extra word replaces the whole base, so that the compound is
+    # nothing but the extra word.
+    is_extra: bool = False
+
+    @property
+    def value(self) -> float:
+        """Return a single value for ranking compounds, higher is better.
+
+        Compounds that are nothing but the extra word make no riddle and are
+        ranked last.
+        """
+        if self.is_extra:
+            return float("-inf")
+        return (
+            self.overlap
+            - self.total_distance
+            + self.stressed_match
+            + self.syllable_ratio
+        )
+
+
+# Sounds are immutable, so equal sounds of different words share one instance.
+sound_pool: Dict[Sound, Sound] = {}
+
+# The pooled sounds by their code, first character and syllable, so that
+# unpacked sounds are found without creating them first.
+packed_sound_pool: Dict[Tuple[int, int, int], Sound] = {}
+
+
+class SoundCursor:
+    """A position in a sound sequence that can be moved independently."""
+
+    __slots__ = ("sequence", "index")
+
+    def __init__(self, sequence: "SoundSequence", index: int = 0) -> None:
+        """Place the cursor at the sound at `index`."""
+        self.sequence = sequence
+        self.index = index
+
+    def __iter__(self) -> "SoundCursor":
+        """Return the cursor itself."""
+        return self
+
+    def __next__(self) -> Sound:
+        """Return the sound at the cursor and move on to the next one."""
+        if self.index < len(self.sequence):
+            sound = self.sequence.sounds[self.index]
+            self.index += 1
+            return sound
+        raise StopIteration
 
 
 class SoundSequence:
     """A sequence of sounds that form a word."""
 
+    __slots__ = (
+        "orth",
+        "phon",
+        "sounds",
+        "codes",
+        "full_vowels",
+        "start_index",
+        "syllable_count",
+    )
+
+    orth: str
+    phon: str
+    sounds: Tuple[Sound, ...]
+    codes: bytes
+    full_vowels: bytes
+    start_index: int
+    syllable_count: int
+
     re_sounds = re.compile(
         """
           pf|t[sS]|dZ       # affricates
@@ -119,28 +342,137 @@ class SoundSequence:
         "6": ["er", "r"],
     }
 
+    # The graphs of each phone together with their lengths, in the order in
+    # which they are tried.
+    phone_graphs = compile_graphs(phone_graph_map)
+
+    # Header of the packed sounds: the number of sounds.
+    packed_header = struct.Struct("<H")
+
     def __init__(self, orth: str, phon: str) -> None:
-        """Initialize the sound sequence."""
-        self.orth = orth
-        self.phon = phon
-        self.sounds = self._parse()
-        self.index = 0
+        """Initialize the sound sequence.
+
+        Sound sequences cannot be changed once they are created, so that one
+        sequence can be shared by all pairs and threads a word is part of.
+        """
+        init = object.__setattr__
+        init(self, "orth", orth)
+        init(self, "phon", phon)
+        sounds = tuple(self._parse())
+        self._init_sounds(sounds, bytes(sound.get_code() for sound in sounds))
+
+    def _init_sounds(self, sounds: Tuple[Sound, ...], codes: bytes) -> None:
+        """Set the sounds and the values derived from them."""
+        init = object.__setattr__
+        init(self, "sounds", sounds)
+
+        # Encoded sounds and their full vowel flags, packed for fast comparisons.
+        full_vowels = phone_table.full_vowels
+        init(self, "codes", codes)
+        init(self, "full_vowels", bytes(full_vowels[code // 2] for code in codes))
+
+        # Values needed for every merge are computed once at parse time.
+        init(self, "start_index", self._find_start_index())
+        init(self, "syllable_count", self.sounds[-1].syllable if self.sounds else 0)
+
+    @classmethod
+    def unpack(cls, orth: str, phon: str, data: bytes) -> "SoundSequence":
+        """Create a sound sequence from the parsed sounds returned by `pack`.
+
+        The phonetic string is not parsed again.
+        """
+        (count,) = cls.packed_header.unpack_from(data)
+        codes_start = cls.packed_header.size
+        chars_start = codes_start + count
+        syllables_start = chars_start + 2 * count
+        end = syllables_start + 2 * count
+        codes = data[codes_start:chars_start]
+        start_chars = array("H", data[chars_start:syllables_start])
+        syllables = array("H", data[syllables_start:end])
+
+        keys = list(zip(codes, start_chars, syllables))
+        pooled = list(map(packed_sound_pool.get, keys))
+        if None in pooled:
+            sounds = tuple(cls._pool_sound(*key) for key in keys)
+        else:
+            sounds = cast(Tuple[Sound, ...], tuple(pooled))
+
+        sequence = cls.__new__(cls)
+        object.__setattr__(sequence, "orth", orth)
+        object.__setattr__(sequence, "phon", phon)
+        sequence._init_sounds(sounds, codes)
+        return sequence
+
+    @staticmethod
+    def _pool_sound(code: int, start_char: int, syllable: int) -> Sound:
+        """Return the pooled sound with the given code, character and syllable."""
+        sound = packed_sound_pool.get((code, start_char, syllable))
+        if sound is not None:
+            return sound
+
+        phone = phone_table.phones[code // 2]
+        sound = Sound(phone, start_char, syllable, bool(code & 1))
+        sound = sound_pool.setdefault(sound, sound)
+        packed_sound_pool[code, start_char, syllable] = sound
+        return sound
+
+    def pack(self) -> bytes:
+        """Return the parsed sounds in a compact form for `unpack`.
+
+        The sound codes are only valid as long as `phone_inventory` is not
+        changed.
+        """
+        start_chars = array("H", (sound.start_char for sound in self.sounds))
+        syllables = array("H", (sound.syllable for sound in self.sounds))
+        return b"".join(
+            [
+                self.packed_header.pack(len(self)),
+                self.codes,
+                start_chars.tobytes(),
+                syllables.tobytes(),
+            ]
+        )
+
+    def __setattr__(self, name: str, value: object) -> None:
+        """Prevent changes to the sound sequence."""
+        raise AttributeError("SoundSequence is immutable")
+
+    def __delattr__(self, name: str) -> None:
+        """Prevent changes to the sound sequence."""
+        raise AttributeError("SoundSequence is immutable")
+
+    def __getstate__(self) -> Tuple:
+        """Return the state of the sound sequence for pickling."""
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state: Tuple) -> None:
+        """Restore the state of a pickled sound sequence."""
+        for name, value in zip(self.__slots__, state):
+            object.__setattr__(self, name, value)
 
     def __len__(self) -> int:
         """Return number of sounds in the sequence."""
         return len(self.sounds)
 
-    def __iter__(self) -> Iterator:
-        """Return iterator."""
-        return self
+    def __iter__(self) -> "SoundCursor":
+        """Return a new cursor over the sounds of the sequence."""
+        return SoundCursor(self)
 
-    def __next__(self) -> Sound:
-        """Return next sound of the sequence."""
-        if self.index < len(self):
-            sound = self.sounds[self.index]
-            self.index += 1
-            return sound
-        raise StopIteration
+    def cursor(self, index: int = 0) -> "SoundCursor":
+        """Return a new cursor over the sounds from `index` on.
+
+        Use `start_index` to skip the onset of the first syllable, i.e. the
+        cluster of consonants before its vowel.
+
+        Examples:
+        * The first syllable in "Banane" is "Ba", its onset is "B". The start
+          index points to "a".
+        * The onset of "Schwan" (which consists of only one syllable) is
+          "Schw". The start index points to "a".
+        * The first syllable in "Uhu" is "U", its onset is "". The start index
+          points to "U".
+        """
+        return SoundCursor(self, index)
 
     def _parse(self) -> List[Sound]:
         """Create of mapping of sounds to characters."""
@@ -150,10 +482,9 @@ class SoundSequence:
         syllable = 1
         stressed = False
         sounds = []
+        phone_graphs = self.phone_graphs
 
-        for m in self.re_sounds.finditer(self.phon):
-            s = m.group()
-
+        for s in self.re_sounds.findall(self.phon):
             # Keep track of stress.
             if s == "'":
                 stressed = True
@@ -164,50 +495,43 @@ class SoundSequence:
                 syllable += 1
                 continue
 
-            sound = Sound(phone=s, start_char=index, syllable=syllable, stressed=False)
-
             # Add stress to the first full vowel in the syllable.
-            if sound.is_full_vowel() and stressed:
-                sound = sound._replace(stressed=True)
+            is_stressed = False
+            if stressed and phone_table.full_vowels[phone_table.intern(s)]:
+                is_stressed = True
                 stressed = False
 
-            for graph in self.phone_graph_map.get(s, [s]):
-                if orth.startswith(graph):
+            sound = Sound(s, index, syllable, is_stressed)
+            sound = sound_pool.setdefault(sound, sound)
+
+            # Every graph is tried in turn from the current position, so a
+            # phone can take up more than one graph.
+            for graph, step in phone_graphs[s]:
+                if orth.startswith(graph, index):
                     sounds.append(sound)
-                    step = len(graph)
-                    orth = orth[step:]
                     index += step
 
         return sounds
 
-    def set_start_index(self) -> None:
-        """Set the index of the iterator to the first full vowel of the word.
-
-        This is the same as ignoring the onset of the first syllable. The onset
-        of a syllable is a cluster of consonants until the first vowel.
-
-        Examples:
-        * The first syllable in "Banane" is "Ba", its onset is "B". The index is
-          set to "a".
-        * The onset of "Schwan" (which consists of only one syllable) is "Schw".
-          The index is set to "a".
-        * The first syllable in "Uhu" is "U", its onset is "". The index is set
-          to "U".
-
-        """
-        for i, sound in enumerate(self.sounds):
-            if sound.is_full_vowel():
-                self.index = i
-                return
+    def _find_start_index(self) -> int:
+        """Return the index of the first full vowel of the word."""
+        for i, full_vowel in enumerate(self.full_vowels):
+            if full_vowel:
+                return i
 
         # If the word only consists of consonants (which is very unlikely)
         # jump directly to the end.
-        self.index = len(self)
+        return len(self)
+
+    def get_nucleus_class(self) -> Optional[str]:
+        """Return the sound class of the first full vowel of the word."""
+        if self.start_index == len(self):
+            return None
+        return get_sound_class(self.sounds[self.start_index].phone)
 
     def count_syllables(self) -> int:
         """Return the number of syllables in the sound sequence."""
-        last_sound = self.sounds[-1]
-        return last_sound.syllable
+        return self.syllable_count
 
     def ends_with_schwa(self) -> bool:
         """Return `True` if the last sound in the sequence is a schwa."""
@@ -216,43 +540,266 @@ class SoundSequence:
 
     def merge(self, other: "SoundSequence") -> Optional[str]:
         """Merge another sound sequence into this one to form a compound."""
+        return self.merge_at(other, self.start_index)
+
+    def merge_at(self, other: "SoundSequence", offset: int) -> Optional[str]:
+        """Merge another sound sequence into this one, aligned at `offset`.
+
+        The first full vowel of `other` is aligned with the sound at `offset`.
+        At the first full vowel of this word (as in `merge`), `other` replaces
+        the onset of the first syllable. At later offsets, it replaces the onset
+        of the syllable at `offset` and the beginning of this word is kept.
+
+        Example: "Banane" + "Schwan" aligned at "a:" is "Baschwane".
+        """
+        if not self._check_syllables(other):
+            return None
+
+        end = self._align(other, offset)
+        if end is None:
+            return None
+
+        return self._compose(other, offset, end)
+
+    def merge_fuzzy(
+        self,
+        other: "SoundSequence",
+        budget: int = 2,
+        band: int = 1,
+        gap_cost: int = 1,
+    ) -> Optional[str]:
+        """Merge another sound sequence into this one, allowing for gaps.
+
+        Unlike `merge`, the sounds do not have to be aligned one to one. A
+        weak sound, i.e. a schwa or a vocalic r, may also be left out on
+        either side at a cost of `gap_cost`. Substituted sounds cost their
+        distance.
+        The words match if the total cost is at most `budget`. Only alignments
+        that stay within `band` sounds of the diagonal are considered.
+        """
+        if not self._check_syllables(other):
+            return None
+
+        result = self._align_banded(other, self.start_index, budget, band, gap_cost)
+        if result is None:
+            return None
+
+        return self._compose(other, self.start_index, result[0])
+
+    def _check_syllables(self, other: "SoundSequence") -> bool:
+        """Return `True` if the syllables of the words allow a merge."""
         # The base word must have more than one syllable.
         if self.count_syllables() < 2:
-            return None
+            if stats.enabled:
+                stats.reject("base too short")
+            return False
 
         # Short words ending in a schwa such as "Fahne" are no good bases.
         if self.count_syllables() == 2 and self.ends_with_schwa():
-            return None
+            if stats.enabled:
+                stats.reject("base ends in schwa")
+            return False
 
         # The extra word may not be longer than the base word.
         if other.count_syllables() > self.count_syllables():
+            if stats.enabled:
+                stats.reject("extra longer than base")
+            return False
+
+        return True
+
+    def _compose(self, other: "SoundSequence", offset: int, end: int) -> str:
+        """Return the compound of `other` aligned from `offset` to `end`."""
+        prefix = ""
+        if offset != self.start_index:
+            onset = self.sounds[self._find_onset(offset)]
+            prefix = self.orth[:onset.start_char]
+
+        # Uhu + huhu = Huhu
+        suffix = ""
+        if end < len(self):
+            suffix = self.orth[self.sounds[end].start_char:]
+
+        return (prefix + other.orth + suffix).capitalize()
+
+    def merge_scored(self, other: "SoundSequence") -> Optional[Tuple[str, MergeScore]]:
+        """Merge another sound sequence into this one and score the compound."""
+        return self.merge_scored_at(other, self.start_index)
+
+    def merge_scored_at(
+        self, other: "SoundSequence", offset: int
+    ) -> Optional[Tuple[str, MergeScore]]:
+        """Merge like `merge_at` and score the compound.
+
+        The score is only computed for compounds that are found, so that
+        `merge_at` stays as fast as possible.
+        """
+        compound = self.merge_at(other, offset)
+        if compound is None:
             return None
 
-        # For each of the words, get the position at which the first vowel is found.
-        self.set_start_index()
-        other.set_start_index()
+        # The alignment stops at the end of the shorter part.
+        j = other.start_index
+        overlap = min(len(self) - offset, len(other) - j)
+        distances = phone_table.distances
+        total_distance = sum(
+            distances[self.codes[offset + k]][other.codes[j + k]]
+            for k in range(overlap)
+        )
+
+        # The lowest bit of a sound code marks stress. A base without a full
+        # vowel has no sound at `offset` to compare.
+        stressed_match = False
+        if overlap:
+            stressed_match = not (self.codes[offset] ^ other.codes[j]) & 1
+
+        score = MergeScore(
+            total_distance,
+            overlap,
+            stressed_match,
+            other.count_syllables() / self.count_syllables(),
+            compound.lower() == other.orth.lower(),
+        )
+        return compound, score
+
+    def _align(self, other: "SoundSequence", offset: int) -> Optional[int]:
+        """Compare the sounds of `other` with the sounds from `offset` on.
+
+        Return the index of the first sound of this word behind the overlap or
+        `None` if the words do not match.
+        """
+        # The positions are tracked locally so that the same sound sequences can
+        # be reused for many merges.
+        i = offset
+        j = other.start_index
+
+        # An extra word without any full vowel cannot be aligned.
+        if j == len(other):
+            if stats.enabled:
+                stats.reject("extra without vowel")
+            return None
 
         # Compare words.
-        for snd1 in self:
-            # Get next sound.
-            snd2 = next(other)
+        distances = phone_table.distances
+        long_base = self.count_syllables() > 2
+        while i < len(self):
+            dist = distances[self.codes[i]][other.codes[j]]
 
-            dist = snd1.get_distance(snd2)
-
-            match = dist <= 1 or (dist == 2 and self.count_syllables() > 2)
+            match = dist <= 1 or (dist == 2 and long_base)
 
             if not match:
+                if stats.enabled:
+                    stats.reject("sound distance")
                 return None
 
-            if other.index == len(other):
+            i += 1
+            j += 1
+
+            if j == len(other):
                 break
 
-        # Uhu + huhu = Huhu
-        if self.index == len(self):
-            return other.orth.capitalize()
+        return i
+
+    def _align_banded(
+        self,
+        other: "SoundSequence",
+        offset: int,
+        budget: int,
+        band: int,
+        gap_cost: int,
+    ) -> Optional[Tuple[int, int]]:
+        """Align the sounds of `other` with the sounds from `offset` on.
+
+        The first full vowels are aligned as in `_align`. The rest is aligned
+        by a weighted edit distance, computed row by row for the sounds of
+        this word. The search stops as soon as no alignment within `budget`
+        is possible anymore.
+
+        Return the index of the first sound of this word behind the overlap
+        and the cost of the alignment, or `None` if the words do not match.
+        """
+        i0 = offset
+        j0 = other.start_index
+        n = len(self) - i0
+        m = len(other) - j0
+
+        # An extra word without any full vowel cannot be aligned.
+        if m == 0:
+            if stats.enabled:
+                stats.reject("extra without vowel")
+            return None
+
+        # A base without any full vowel has nothing to compare, as in `_align`.
+        if n == 0:
+            return i0, 0
 
-        sound = self.sounds[self.index]
-        index = sound.start_char
-        s = other.orth + self.orth[index:]
+        distances = phone_table.distances
+        codes = self.codes
+        other_codes = other.codes
 
-        return s.capitalize()
+        # Sounds can only be substituted at the distances allowed in `_align`.
+        max_dist = 2 if self.count_syllables() > 2 else 1
+
+        # The first full vowels must match.
+        dist = distances[codes[i0]][other_codes[j0]]
+        if dist > max_dist:
+            if stats.enabled:
+                stats.reject("sound distance")
+            return None
+
+        # Only weak sounds may be left out.
+        inf = budget + 1
+        gaps = [gap_cost if s.phone in weak_phones else inf for s in self.sounds]
+        other_gaps = [gap_cost if s.phone in weak_phones else inf for s in other.sounds]
+
+        # row[j] is the lowest cost of aligning the first i sounds of this word
+        # with the first j sounds of `other`, both counted from the vowels.
+        row = [inf] * (m + 1)
+        row[1] = dist
+        for j in range(2, min(m, 1 + band) + 1):
+            row[j] = min(row[j - 1] + other_gaps[j0 + j - 1], inf)
+
+        best: Optional[Tuple[int, int]] = None
+        for i in range(1, n + 1):
+            if i > 1:
+                prev = row
+                row = [inf] * (m + 1)
+                code = codes[i0 + i - 1]
+                gap = gaps[i0 + i - 1]
+                for j in range(max(1, i - band), min(m, i + band) + 1):
+                    k = j0 + j - 1
+                    dist = distances[code][other_codes[k]]
+                    cost = prev[j - 1] + (dist if dist <= max_dist else inf)
+                    cost = min(cost, prev[j] + gap, row[j - 1] + other_gaps[k])
+                    row[j] = min(cost, inf)
+
+            # The overlap ends with the last sound of `other` or of this word.
+            # In the latter case the rest of `other` is simply appended.
+            ends = [row[m]] if i < n else row
+            cost = min(ends)
+            if cost <= budget and (best is None or cost < best[1]):
+                best = (i0 + i, cost)
+
+            # Costs never decrease from one row to the next.
+            row_min = min(row)
+            if row_min > budget or (best is not None and row_min >= best[1]):
+                break
+
+        if best is None and stats.enabled:
+            stats.reject("sound distance")
+        return best
+
+    def _find_onset(self, index: int) -> int:
+        """Return the index of the first sound of the onset before `index`.
+
+        The onset consists of the sounds before `index` that belong to the
+        same syllable and are no full vowels.
+        """
+        syllable = self.sounds[index].syllable
+        while (
+            index > 0
+            and self.sounds[index - 1].syllable == syllable
+            and not self.full_vowels[index - 1]
+        ):
+            index -= 1
+        return index
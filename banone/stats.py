@@ -0,0 +1,110 @@
+"""Module providing counters and timers for the generation pipeline."""
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from typing import Any
+from typing import Dict
+from typing import Iterator
+
+
+class PipelineStats:
+    """Counts of rejected word pairs and timings of the generation stages.
+
+    Instrumentation is turned off by default. Code that counts or measures
+    anything checks `enabled` first, so the overhead is a single attribute
+    lookup as long as it stays turned off. The statistics can be updated from
+    several threads at once.
+    """
+
+    def __init__(self) -> None:
+        """Initialize empty statistics."""
+        self.enabled = False
+        self._lock = threading.Lock()
+        self.reset()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """Return the state for pickling, without the lock."""
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        """Restore the pickled state with a new lock."""
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def reset(self) -> None:
+        """Remove all collected counts and timings."""
+        with self._lock:
+            self.counts: Counter = Counter()
+            self.rejections: Counter = Counter()
+            self.timings: Dict[str, float] = {}
+
+    def count(self, name: str, n: int = 1) -> None:
+        """Add `n` to the count `name`, leaving out counts of zero."""
+        if n:
+            with self._lock:
+                self.counts[name] += n
+
+    def reject(self, reason: str, n: int = 1) -> None:
+        """Count `n` word pairs rejected for `reason`, leaving out counts of zero."""
+        if n:
+            with self._lock:
+                self.rejections[reason] += n
+
+    def add_time(self, stage: str, seconds: float) -> None:
+        """Add the time spent in a stage."""
+        with self._lock:
+            self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def timer(self, stage: str) -> Iterator[None]:
+        """Measure the time spent in the block if instrumentation is enabled."""
+        if not self.enabled:
+            yield
+            return
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(stage, time.perf_counter() - start)
+
+    def update(self, other: "PipelineStats") -> None:
+        """Add the statistics collected elsewhere, e.g. in a worker process."""
+        with self._lock:
+            self.counts.update(other.counts)
+            self.rejections.update(other.rejections)
+        for stage, seconds in other.timings.items():
+            self.add_time(stage, seconds)
+
+    def show(self) -> None:
+        """Print the collected statistics."""
+        print("========================")
+        print("Pipeline stats")
+        print("------------------------")
+
+        for name, count in self.counts.most_common():
+            print("{}:\t{:>10}".format(name, count))
+
+        print("------------------------")
+        print("Rejected pairs")
+        print("------------------------")
+
+        for reason, count in self.rejections.most_common():
+            print("{}:\t{:>10}".format(reason, count))
+
+        print("------------------------")
+        print("Stage timings (s)")
+        print("------------------------")
+
+        for stage, seconds in self.timings.items():
+            print("{}:\t{:>10.3f}".format(stage, seconds))
+
+        print("========================")
+
+
+# Statistics of the current process.
+stats = PipelineStats()
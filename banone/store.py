@@ -0,0 +1,132 @@
+"""Module providing a persistent store of generated riddles."""
+import hashlib
+import json
+import os
+import tempfile
+from contextlib import suppress
+from pathlib import Path
+
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from banone.generator import Generator
+from banone.generator import Riddle
+from banone.lemma import Lemma
+from banone.stats import stats
+
+# Version of the store format. Increase it whenever the rules for generating
+# riddles change so that the riddles of older runs are not reused.
+STORE_VERSION = 1
+
+
+def hash_lemma(lemma: Lemma) -> str:
+    """Return a hash of all fields of a lemma that a riddle can depend on."""
+    data = json.dumps([lemma.orth, lemma.to_dict()], sort_keys=True)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+class ResultStore:
+    """Riddles of a previous run together with hashes of the lemmas used.
+
+    A riddle only depends on its base and its extra word. When the dictionary
+    changes, the riddles of all pairs of unchanged lemmas can be reused, and
+    only pairs involving added or changed lemmas need to be evaluated again.
+    """
+
+    def __init__(self, path: Path) -> None:
+        """Load the store from `path`, or start an empty one."""
+        self.path = path
+        self.hashes: Dict[str, str] = {}
+        self.riddles: List[Riddle] = []
+
+        try:
+            with path.open(encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if data.get("version") == STORE_VERSION:
+            self.hashes = data["hashes"]
+            self.riddles = [Riddle(*fields) for fields in data["riddles"]]
+
+    def save(self) -> None:
+        """Write the store to its file.
+
+        The store is written to a temporary file of its own first, so that
+        concurrent runs never write into the same file.
+        """
+        data = {
+            "version": STORE_VERSION,
+            "hashes": self.hashes,
+            "riddles": [list(riddle) for riddle in self.riddles],
+        }
+        fd, tmp_name = tempfile.mkstemp(
+            prefix=self.path.name + ".", suffix=".tmp", dir=self.path.parent
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_name, self.path)
+        except BaseException:
+            with suppress(OSError):
+                os.unlink(tmp_name)
+            raise
+
+    def update(self, gen: Generator) -> List[Riddle]:
+        """Bring the riddles up to date with the dictionary of `gen` and save them.
+
+        The riddles are returned in the same order as `Generator.iter_riddles`
+        would generate them.
+        """
+        hashes = {lemma.orth: hash_lemma(lemma) for lemma in gen.dict}
+        changed = set(
+            orth for orth, digest in hashes.items() if self.hashes.get(orth) != digest
+        )
+
+        # Reuse the riddles of pairs of lemmas that are still the same.
+        riddles = [
+            riddle
+            for riddle in self.riddles
+            if riddle.base in hashes
+            and riddle.extra in hashes
+            and riddle.base not in changed
+            and riddle.extra not in changed
+        ]
+        if stats.enabled:
+            stats.count("riddles reused", len(riddles))
+
+        # Group the unchanged extra words by their first vowel, so that changed
+        # nouns are only tried with the extra words they can be merged with.
+        extras_by_key: Dict[Optional[str], List[Lemma]] = {}
+        for extra in gen.dict:
+            if extra.orth in changed:
+                riddles.extend(gen.iter_riddles_for_extra(extra))
+                continue
+            key = extra.get_stem_sound_sequence().get_nucleus_class()
+            extras_by_key.setdefault(key, []).append(extra)
+
+        for base in gen.dict.iter_nouns():
+            if base.orth not in changed:
+                continue
+            key = base.get_sound_sequence().get_nucleus_class()
+            if key is None:
+                # Nouns without a full vowel are compatible with every extra word.
+                extras = [e for k, group in extras_by_key.items() for e in group if k]
+            else:
+                extras = extras_by_key.get(key, [])
+            for extra in extras:
+                if stats.enabled:
+                    stats.count("pairs tried")
+                riddle = gen.make_riddle(base, extra)
+                if riddle:
+                    riddles.append(riddle)
+
+        positions = {orth: i for i, orth in enumerate(hashes)}
+        riddles.sort(key=lambda r: (positions[r.extra], positions[r.base]))
+
+        self.hashes = hashes
+        self.riddles = riddles
+        self.save()
+
+        return riddles
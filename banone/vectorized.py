@@ -0,0 +1,226 @@
+"""Module providing a NumPy-based engine for merging many lemmas at once."""
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+from banone.dictionary import Dictionary
+from banone.lemma import Lemma
+from banone.sound import SoundSequence
+from banone.sound import phone_table
+from banone.stats import stats
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # type: ignore
+
+# Distance used for padding positions behind the end of a word.
+NO_MATCH = 100
+
+
+class VectorizedEngine:
+    """Merge engine that compares whole blocks of word pairs with NumPy.
+
+    The encoded sounds of each word are stored in integer arrays that start at
+    its first full vowel. As in `Dictionary.iter_bases`, the words are grouped
+    by the sound class of their first full vowel. The distances of all sounds of
+    a block of extra words and the nouns of the same group are then looked up
+    at once in a precomputed table. The rules of `SoundSequence.merge` are
+    applied as boolean masks, so the engine finds exactly the same compounds.
+    """
+
+    def __init__(self, dictionary: Dictionary, block_size: int = 64) -> None:
+        """Encode the sounds of all words in the dictionary."""
+        if np is None:
+            raise ImportError("The vectorized engine requires NumPy.")
+
+        self.block_size = block_size
+        self.extras = list(dictionary)
+        self.bases = list(dictionary.iter_nouns())
+
+        extra_seqs = [lemma.get_stem_sound_sequence() for lemma in self.extras]
+        base_seqs = [lemma.get_sound_sequence() for lemma in self.bases]
+
+        # The distances of all encoded sounds plus a code used for padding that
+        # cannot be matched with anything.
+        size = len(phone_table.distances) + 1
+        self.distances = np.full((size, size), NO_MATCH, dtype=np.int16)
+        self.distances[:-1, :-1] = phone_table.distances
+
+        length = max(
+            [len(seq) - seq.start_index for seq in extra_seqs + base_seqs] + [1]
+        )
+        self.extra_codes, self.extra_lengths = self._encode(extra_seqs, length)
+        self.base_codes, self.base_lengths = self._encode(base_seqs, length)
+
+        self.extra_syllables = np.array([seq.count_syllables() for seq in extra_seqs])
+        self.base_syllables = np.array([seq.count_syllables() for seq in base_seqs])
+
+        # The base word must have more than one syllable, and short words ending
+        # in a schwa such as "Fahne" are no good bases. As in `merge`, only words
+        # of two syllables are checked for the schwa, since the sounds of a
+        # word whose spelling does not match its pronunciation may be empty.
+        self.base_schwa = np.array(
+            [seq.count_syllables() == 2 and seq.ends_with_schwa() for seq in base_seqs],
+            dtype=bool,
+        )
+        self.base_valid = (self.base_syllables >= 2) & ~(
+            (self.base_syllables == 2) & self.base_schwa
+        )
+
+        # Only nouns with the same nucleus class as an extra word can match it,
+        # plus nouns without a full vowel, which are compatible with every extra
+        # word. Extra words without a full vowel cannot be merged at all.
+        base_keys = [seq.get_nucleus_class() for seq in base_seqs]
+        self.groups: Dict[str, Tuple["np.ndarray", "np.ndarray"]] = {}
+        extra_rows: Dict[Optional[str], List[int]] = {}
+        for row, seq in enumerate(extra_seqs):
+            extra_rows.setdefault(seq.get_nucleus_class(), []).append(row)
+        for key, rows in extra_rows.items():
+            if key is None:
+                continue
+            base_rows = [
+                col for col, base_key in enumerate(base_keys) if base_key in (key, None)
+            ]
+            self.groups[key] = (
+                np.array(rows, dtype=np.intp),
+                np.array(base_rows, dtype=np.intp),
+            )
+
+        # Only needed to count the pairs for the statistics.
+        self.grouped_extras = sum(len(rows) for rows, _ in self.groups.values())
+        base_cols = {lemma.orth: col for col, lemma in enumerate(self.bases)}
+        self.same_cols = np.array(
+            [base_cols.get(lemma.orth, -1) for lemma in self.extras], dtype=np.intp
+        )
+
+    def _encode(
+        self, seqs: List[SoundSequence], length: int
+    ) -> Tuple["np.ndarray", "np.ndarray"]:
+        """Encode the sounds from the first full vowel on as padded code arrays."""
+        padding = self.distances.shape[0] - 1
+        codes = np.full((len(seqs), length), padding, dtype=np.int32)
+        lengths = np.zeros(len(seqs), dtype=np.int32)
+        for row, seq in enumerate(seqs):
+            seq_codes = np.frombuffer(seq.codes, dtype=np.uint8)[seq.start_index:]
+            lengths[row] = len(seq_codes)
+            codes[row, :len(seq_codes)] = seq_codes
+        return codes, lengths
+
+    def _match_block(
+        self, extra_rows: "np.ndarray", base_rows: "np.ndarray"
+    ) -> "np.ndarray":
+        """Return a mask of the matching pairs of the given extra words and nouns."""
+        # Valid bases are selected first, so that fewer distances are looked up.
+        base_rows = base_rows[
+            self.base_valid[base_rows]
+            & (self.base_syllables[base_rows] >= self.extra_syllables[extra_rows].min())
+        ]
+        mask = np.zeros((len(extra_rows), len(self.bases)), dtype=bool)
+        if not len(base_rows):
+            return mask
+
+        # Only the sounds up to the end of the longest extra word are compared.
+        length = self.extra_lengths[extra_rows].max()
+        extra_codes = self.extra_codes[extra_rows, None, :length]
+        base_codes = self.base_codes[None, base_rows, :length]
+        dist = self.distances[base_codes, extra_codes]
+
+        # Sounds with a larger distance are only allowed in longer base words.
+        base_syllables = self.base_syllables[base_rows]
+        long_base = (base_syllables > 2)[None, :, None]
+        match = (dist <= 1) | ((dist == 2) & long_base)
+
+        # Only the sounds up to the end of the shorter word are compared.
+        extra_lengths = self.extra_lengths[extra_rows, None]
+        compared = np.minimum(extra_lengths, self.base_lengths[None, base_rows])
+        positions = np.arange(length)[None, None, :]
+        match |= positions >= compared[:, :, None]
+
+        # The extra word may not be longer than the base word.
+        extra_syllables = self.extra_syllables[extra_rows, None]
+        mask[:, base_rows] = match.all(axis=2) & (
+            extra_syllables <= base_syllables[None, :]
+        )
+        return mask
+
+    def iter_compounds(self) -> Iterator[Tuple[Lemma, Lemma, Lemma]]:
+        """Generate `(base, extra, compound)` for all pairs that can be merged.
+
+        The pairs come in the same order as in `Generator.iter_riddles`.
+        """
+        # The matching pairs of all groups are collected and then sorted into
+        # the order of the extra words and nouns in the dictionary.
+        rows: List["np.ndarray"] = []
+        cols: List["np.ndarray"] = []
+        for extra_rows, base_rows in self.groups.values():
+            for start in range(0, len(extra_rows), self.block_size):
+                end = start + self.block_size
+                block = extra_rows[start:end]
+                mask = self._match_block(block, base_rows)
+                if stats.enabled:
+                    self._count_block(block, base_rows, mask)
+                block_rows, block_cols = np.nonzero(mask)
+                rows.append(block[block_rows])
+                cols.append(block_cols)
+
+        # Extra words without a full vowel are not in any group.
+        if stats.enabled:
+            skipped = (len(self.extras) - self.grouped_extras) * len(self.bases)
+            stats.reject("first vowel (index)", skipped)
+
+        if not rows:
+            return
+        extra_rows = np.concatenate(rows)
+        base_cols = np.concatenate(cols)
+        order = np.lexsort((base_cols, extra_rows))
+
+        for row, col in zip(extra_rows[order], base_cols[order]):
+            extra = self.extras[row]
+            base = self.bases[col]
+            if base.orth == extra.orth:
+                continue
+            yield base, extra, Lemma(self._build_compound(base, extra))
+
+    def _count_block(
+        self, extra_rows: "np.ndarray", base_rows: "np.ndarray", mask: "np.ndarray"
+    ) -> None:
+        """Count the pairs and rejections as `Generator.iter_riddles` does.
+
+        `mask` holds the matching pairs as returned by `_match_block`. The
+        reasons for the rejections are checked in the order of `merge`.
+        """
+        syllables = self.base_syllables[None, base_rows]
+        too_short = syllables < 2
+        schwa = ~too_short & (syllables == 2) & self.base_schwa[None, base_rows]
+        longer = (
+            ~too_short & ~schwa & (self.extra_syllables[extra_rows, None] > syllables)
+        )
+        same = self.same_cols[extra_rows, None] == base_rows[None, :]
+        rest = ~(too_short | schwa | longer | same)
+
+        stats.reject("same word", int(same.sum()))
+        stats.count("pairs tried", same.size - int(same.sum()))
+        skipped = len(extra_rows) * (len(self.bases) - len(base_rows))
+        stats.reject("first vowel (index)", skipped)
+        stats.reject("base too short", int((too_short & ~same).sum()))
+        stats.reject("base ends in schwa", int((schwa & ~same).sum()))
+        stats.reject("extra longer than base", int((longer & ~same).sum()))
+        stats.reject("sound distance", int((rest & ~mask[:, base_rows]).sum()))
+
+    @staticmethod
+    def _build_compound(base: Lemma, extra: Lemma) -> str:
+        """Return the compound of two lemmas that are known to match."""
+        base_seq = base.get_sound_sequence()
+        extra_seq = extra.get_stem_sound_sequence()
+
+        index = base_seq.start_index + len(extra_seq) - extra_seq.start_index
+
+        # Uhu + huhu = Huhu
+        if index >= len(base_seq):
+            return extra_seq.orth.capitalize()
+
+        start_char = base_seq.sounds[index].start_char
+        return (extra_seq.orth + base_seq.orth[start_char:]).capitalize()
@@ -0,0 +1,141 @@
+"""Generator for synthetic dictionaries with plausible German SAMPA entries."""
+import random
+from pathlib import Path
+
+import yaml
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+from banone.sound import SoundSequence
+
+try:
+    from yaml import CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeDumper  # type: ignore
+
+# Phones paired with one of their spellings, see `SoundSequence.phone_graph_map`.
+onsets = [
+    ("b", "b"),
+    ("d", "d"),
+    ("f", "f"),
+    ("g", "g"),
+    ("h", "h"),
+    ("k", "k"),
+    ("l", "l"),
+    ("m", "m"),
+    ("n", "n"),
+    ("p", "p"),
+    ("R", "r"),
+    ("S", "sch"),
+    ("t", "t"),
+    ("ts", "z"),
+    ("v", "w"),
+    ("bR", "br"),
+    ("kl", "kl"),
+    ("Sv", "schw"),
+    ("tR", "tr"),
+]
+vowels = [
+    ("a", "a"),
+    ("a:", "ah"),
+    ("E", "e"),
+    ("e:", "eh"),
+    ("I", "i"),
+    ("i:", "ie"),
+    ("O", "o"),
+    ("o:", "oh"),
+    ("U", "u"),
+    ("u:", "uh"),
+    ("Y", "ü"),
+    ("aI", "ei"),
+    ("aU", "au"),
+    ("OY", "eu"),
+]
+codas = [
+    ("", ""),
+    ("", ""),
+    ("n", "n"),
+    ("l", "l"),
+    ("m", "m"),
+    ("s", "s"),
+    ("t", "t"),
+    ("x", "ch"),
+    ("Nk", "nk"),
+]
+
+colors = ["blau", "braun", "gelb", "grün", "rot", "schwarz", "weiß", None, None]
+properties = ["groß", "klein", "krumm", "rund", "süß", "gefährlich", None]
+actions = ["bellt", "fliegt", "schwimmt im Wasser", "singt", None, None, None]
+
+
+def make_word(rng: random.Random, pos: str) -> Tuple[str, str]:
+    """Return the spelling and the SAMPA transcription of a random word."""
+    syllables = rng.choice([1, 2, 2, 3, 3, 4])
+    stressed = rng.randrange(syllables)
+    orth, phon = [], []
+    for i in range(syllables):
+        onset, vowel, coda = rng.choice(onsets), rng.choice(vowels), rng.choice(codas)
+        # Only stressed vowels are long.
+        if i != stressed:
+            vowel = (vowel[0].rstrip(":"), vowel[1].rstrip("h").replace("ie", "i"))
+        stress = "'" if i == stressed else ""
+        phon.append(stress + onset[0] + vowel[0] + coda[0])
+        orth.append(onset[1] + vowel[1] + coda[1])
+
+    # Verbs end in -en, and many nouns end in a schwa.
+    if pos == "VB":
+        phon.append("@n")
+        orth.append("en")
+    elif pos == "NN" and rng.random() < 0.3:
+        phon.append("n@")
+        orth.append("ne")
+
+    return "".join(orth), "-".join(phon)
+
+
+def is_aligned(orth: str, phon: str) -> bool:
+    """Return `True` if every phone of the word is mapped to its spelling."""
+    phones = [p for p in SoundSequence.re_sounds.findall(phon) if p not in "-'"]
+    return len(SoundSequence(orth, phon).sounds) == len(phones)
+
+
+def make_lexicon(size: int, seed: int = 0) -> Dict[str, Dict[str, str]]:
+    """Return a synthetic dictionary with `size` entries."""
+    rng = random.Random(seed)
+    entries: Dict[str, Dict[str, str]] = {}
+    while len(entries) < size:
+        pos = rng.choices(["NN", "VB", "ADJ"], [8, 1, 1])[0]
+        orth, phon = make_word(rng, pos)
+        if pos == "NN":
+            orth = orth.capitalize()
+        if orth in entries or not is_aligned(orth, phon):
+            continue
+
+        entry = {"phon": phon, "pos": pos}
+        if pos == "NN":
+            entry["determiner"] = rng.choice(["ein", "eine"])
+        traits: List[Tuple[str, List]] = [
+            ("color", colors),
+            ("property", properties),
+            ("action", actions),
+        ]
+        for key, values in traits:
+            value = rng.choice(values)
+            if value:
+                entry[key] = value
+        # Every entry needs at least one trait for the questions.
+        if len(entry) == 2 or (pos == "NN" and len(entry) == 3):
+            entry["property"] = rng.choice([p for p in properties if p])
+        entries[orth] = entry
+    return entries
+
+
+def write_lexicon(path: Path, size: int, seed: int = 0) -> Path:
+    """Write a synthetic dictionary with `size` entries to a YAML file."""
+    entries = make_lexicon(size, seed)
+    with path.open("w", encoding="utf-8") as f:
+        yaml.dump(
+            entries, f, Dumper=SafeDumper, allow_unicode=True, sort_keys=False
+        )
+    return path
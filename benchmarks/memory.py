@@ -0,0 +1,94 @@
+"""Measure the memory used per lemma of a loaded dictionary.
+
+With `--revision`, the `banone` package of that git revision is measured as
+well, e.g. `e6e0d3b^` for the numbers before slotted lemmas and packed sounds.
+The synthetic lexicon is always written by the current `benchmarks.lexicon`.
+
+Usage: python -m benchmarks.memory [--revision REV] [SIZE]
+"""
+import argparse
+import io
+import os
+import subprocess
+import sys
+import tarfile
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+from banone.dictionary import Dictionary
+from benchmarks.lexicon import write_lexicon
+
+# Root of the repository, which holds the `banone` and `benchmarks` packages.
+root = Path(__file__).resolve().parent.parent
+
+
+def measure(size: int) -> float:
+    """Return the number of bytes allocated per lemma of a synthetic dictionary."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_lexicon(Path(tmp) / "lexicon.yaml", size)
+
+        tracemalloc.start()
+        dictionary = Dictionary(path, use_cache=False)
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        # The dictionary has to be alive until the memory has been measured.
+        del dictionary
+
+    return current / size
+
+
+def measure_revision(revision: str, size: int) -> float:
+    """Return the result of `measure` for the `banone` package at `revision`.
+
+    The package is exported from git and measured in a fresh process, so that
+    it does not share any modules or memory with the current one.
+    """
+    archive = subprocess.run(
+        ["git", "archive", revision, "banone"],
+        cwd=root,
+        check=True,
+        capture_output=True,
+    ).stdout
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+            tar.extractall(tmp)
+
+        # The exported package comes first on the path, the benchmarks are
+        # taken from the current checkout.
+        code = "from benchmarks.memory import measure; print(measure({}))".format(size)
+        env = dict(os.environ, PYTHONPATH=str(root))
+        output = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=tmp,
+            env=env,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+
+    return float(output)
+
+
+def main() -> None:
+    """Print the memory used per lemma."""
+    parser = argparse.ArgumentParser(description="Measure the memory per lemma.")
+    parser.add_argument("size", type=int, nargs="?", default=100_000)
+    parser.add_argument(
+        "--revision", help="also measure the banone package of this git revision"
+    )
+    args = parser.parse_args()
+
+    if args.revision:
+        print(
+            "{} entries at {}: {:.0f} bytes per lemma".format(
+                args.size, args.revision, measure_revision(args.revision, args.size)
+            )
+        )
+    print("{} entries: {:.0f} bytes per lemma".format(args.size, measure(args.size)))
+
+
+if __name__ == "__main__":
+    main()
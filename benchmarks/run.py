@@ -0,0 +1,174 @@
+"""Benchmark suite for the stages of the banone generator.
+
+Every dictionary size is measured in a fresh process so that the peak memory
+usage of one size does not affect the next. The results are printed as JSON.
+For `merge` and `generate_all`, the items counted are pairs of words.
+
+Usage: python -m benchmarks.run [--sizes 1000 10000 100000] [--output FILE]
+"""
+import argparse
+import hashlib
+import json
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+
+from banone.dictionary import Dictionary
+from banone.dictionary import get_cache_path
+from banone.generator import Generator
+from banone.lemma import Lemma
+from banone.sound import SoundSequence
+from benchmarks.lexicon import write_lexicon
+
+
+def timed(func: Callable[[], int]) -> Dict[str, float]:
+    """Run `func` and return its run time and the number of items per second."""
+    start = time.perf_counter()
+    count = func()
+    seconds = time.perf_counter() - start
+    return {
+        "seconds": seconds,
+        "items": count,
+        "items_per_second": count / seconds if seconds else 0.0,
+    }
+
+
+def run_size(size: int, max_generate_size: int, sample_size: int) -> Dict[str, Any]:
+    """Measure all stages for a synthetic dictionary with `size` entries."""
+    stages: Dict[str, Dict[str, float]] = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_lexicon(Path(tmp) / "lexicon.yaml", size)
+
+        # Parsing the YAML file and writing the cache are timed separately.
+        def load_yaml() -> int:
+            Dictionary(path, use_cache=False)
+            return size
+
+        entries = Dictionary(path, use_cache=False).entries
+        digest = hashlib.sha256(path.read_bytes()).digest()
+
+        def write_cache() -> int:
+            Dictionary._write_cache(get_cache_path(path), digest, entries)
+            return size
+
+        def load_cache() -> int:
+            Dictionary(path, use_cache=True)
+            return size
+
+        stages["load_yaml"] = timed(load_yaml)
+        stages["write_cache"] = timed(write_cache)
+        stages["load_cache"] = timed(load_cache)
+
+        gen = Generator(path)
+        lemmas = list(gen.dict)
+
+        def parse() -> int:
+            for lemma in lemmas:
+                SoundSequence(lemma.orth, lemma.phon)
+            return len(lemmas)
+
+        fresh = [Lemma(lemma.orth, lemma.to_dict()) for lemma in lemmas]
+
+        def get_stem() -> int:
+            for lemma in fresh:
+                lemma.get_stem()
+            return len(fresh)
+
+        stages["parse"] = timed(parse)
+        stages["get_stem"] = timed(get_stem)
+
+        rng = random.Random(0)
+        nouns = list(gen.dict.iter_nouns())
+        pairs = [(rng.choice(nouns), rng.choice(lemmas)) for _ in range(sample_size)]
+
+        def merge() -> int:
+            for base, extra in pairs:
+                base.merge(extra)
+            return len(pairs)
+
+        stages["merge"] = timed(merge)
+
+        if size <= max_generate_size:
+            # The pairs are counted beforehand so that only the generation is
+            # timed.
+            pair_count = sum(
+                len(list(gen.dict.iter_bases(extra))) for extra in lemmas
+            )
+
+            def generate_all() -> int:
+                for _ in gen.iter_riddles():
+                    pass
+                return pair_count
+
+            stages["generate_all"] = timed(generate_all)
+
+    # On Linux, the maximum resident set size is given in kilobytes.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {"size": size, "stages": stages, "peak_memory_kb": peak}
+
+
+def main() -> None:
+    """Run the benchmarks and print the results as JSON."""
+    parser = argparse.ArgumentParser(description="Benchmark banone.")
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000]
+    )
+    parser.add_argument(
+        "--max-generate-size",
+        type=int,
+        default=10_000,
+        help="largest dictionary to run the full generation for",
+    )
+    parser.add_argument(
+        "--sample-size",
+        type=int,
+        default=100_000,
+        help="number of random pairs to merge",
+    )
+    parser.add_argument("--output", type=Path, help="write the results to a file")
+    parser.add_argument("--single", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        result = run_size(args.sizes[0], args.max_generate_size, args.sample_size)
+        print(json.dumps(result))
+        return
+
+    runs: List[Dict[str, Any]] = []
+    for size in args.sizes:
+        command = [
+            sys.executable,
+            "-m",
+            "benchmarks.run",
+            "--single",
+            "--sizes",
+            str(size),
+            "--max-generate-size",
+            str(args.max_generate_size),
+            "--sample-size",
+            str(args.sample_size),
+        ]
+        output = subprocess.run(command, check=True, capture_output=True, text=True)
+        runs.append(json.loads(output.stdout))
+
+    results = {"python": platform.python_version(), "runs": runs}
+    text = json.dumps(results, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,8 +3,35 @@ from pathlib import Path
 import pytest
 
 from banone.dictionary import Dictionary
+from banone.sound import near_matches
+from banone.sound import set_near_matches
 
 
 @pytest.fixture(scope="session")
-def fxt_dict():
-    return Dictionary(Path("banone/dict/de.yaml"))
+def fxt_shared_dict_path(tmp_path_factory):
+    # A copy of the dictionary for all tests that do not change it, so that no
+    # cache file is written to the source tree.
+    path = tmp_path_factory.mktemp("dict") / "de.yaml"
+    path.write_bytes(Path("banone/dict/de.yaml").read_bytes())
+    return path
+
+
+@pytest.fixture(scope="session")
+def fxt_dict(fxt_shared_dict_path):
+    return Dictionary(fxt_shared_dict_path)
+
+
+@pytest.fixture
+def fxt_dict_path(tmp_path):
+    # A copy of the dictionary, so that cache files are written to `tmp_path`.
+    path = tmp_path / "de.yaml"
+    path.write_bytes(Path("banone/dict/de.yaml").read_bytes())
+    return path
+
+
+@pytest.fixture
+def fxt_near_matches():
+    # Restore the default near matches after a test has changed them.
+    default = list(near_matches)
+    yield
+    set_near_matches(default)
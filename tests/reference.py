@@ -0,0 +1,328 @@
+# Frozen copy of the merge and the riddle formatting of the original
+# implementation, used as the oracle of the differential tests. Do not optimize
+# or change it together with the code in `banone`, so that regressions there
+# can be caught.
+import copy
+import re
+from functools import lru_cache
+
+from typing import Iterator
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+
+re_full_vowels = re.compile("^[aeiouy29]", re.I)
+
+
+class Sound(NamedTuple):
+    """A sound that is part of a word."""
+
+    phone: str
+    start_char: int
+    syllable: int
+    stressed: bool
+
+    def is_full_vowel(self) -> bool:
+        """Return `True` if the sound is a full vowel."""
+        if re_full_vowels.match(self.phone):
+            return True
+        return False
+
+    def get_distance(self, other: "Sound") -> int:
+        """Return a numerical distance between this sound and another."""
+        p1, p2 = self.phone, other.phone
+
+        if p1 == p2:
+            return 0
+
+        # Match long and short vowels such as "a" and "a:" but only if the short vowel
+        # is not stressed.
+        if (p1 == p2 + ":" and not other.stressed) or (
+            p2 == p1 + ":" and not self.stressed
+        ):
+            return 1
+
+        # Allow for some additional matches that give a larger distance.
+        if (
+            set([p1, p2]) == set(["m", "n"])
+            or set([p1, p2]) == set(["l", "R"])
+            or set([p1, p2]) == set(["pf", "p"])
+        ):
+            return 2
+
+        # The two sounds cannot be matched at all.
+        return 100
+
+
+class SoundSequence:
+    """A sequence of sounds that form a word."""
+
+    re_sounds = re.compile(
+        """
+          pf|t[sS]|dZ       # affricates
+        | [pbtdkg]          # plosives
+        | [fvszSZCjxh]      # fricatives
+        | [mnNlR]           # sonorants
+        | a[IU]|OY          # diphthongs
+        | [ieEaouy2][:]?    # vowels that can be lengthened (when stressed)
+        | [IOUY9]           # vowels that are always short
+        | [@6]              # schwa and vocalic r
+        | [-']              # syllable boundary and stress - not actually sounds
+    """,
+        re.VERBOSE,
+    )
+
+    phone_graph_map = {
+        "pf": ["pf"],
+        "ts": ["tz", "z"],
+        "tS": ["tsch"],
+        "dZ": ["dsch", "j"],
+        "p": ["pp", "p", "b"],
+        "b": ["bb", "b"],
+        "t": ["tt", "dt", "t", "d"],
+        "d": ["dd", "d"],
+        "k": ["ck", "kk", "k", "g"],
+        "g": ["gg", "g"],
+        "f": ["f", "v"],
+        "v": ["v", "w"],
+        "s": ["ss", "ß", "s"],
+        "z": ["s"],
+        "S": ["sch", "s"],
+        "Z": ["g"],
+        "C": ["ch"],
+        "j": ["j", "i"],
+        "x": ["ch"],
+        "h": ["h"],
+        "m": ["mm", "m"],
+        "n": ["nn", "n"],
+        "N": ["ng", "n"],
+        "l": ["ll", "l"],
+        "R": ["rr", "r"],
+        "aI": ["ai", "ei"],
+        "aU": ["au"],
+        "OY": ["äu", "eu", "oi"],
+        "i:": ["ieh", "ie", "i"],
+        "e:": ["eh", "ee", "e"],
+        "E:": ["äh", "ä"],
+        "a:": ["ah", "aa", "a"],
+        "o:": ["oh", "oo", "o"],
+        "u:": ["uh", "u"],
+        "y:": ["üh", "ü"],
+        "2:": ["öh", "ö"],
+        "I": ["i"],
+        "E": ["e", "ä"],
+        "a": ["a"],
+        "O": ["o"],
+        "U": ["u"],
+        "Y": ["ü"],
+        "9": ["ö"],
+        "@": ["e"],
+        "6": ["er", "r"],
+    }
+
+    def __init__(self, orth: str, phon: str) -> None:
+        """Initialize the sound sequence."""
+        self.orth = orth
+        self.phon = phon
+        self.sounds = self._parse()
+        self.index = 0
+
+    def __len__(self) -> int:
+        """Return number of sounds in the sequence."""
+        return len(self.sounds)
+
+    def __iter__(self) -> Iterator:
+        """Return iterator."""
+        return self
+
+    def __next__(self) -> Sound:
+        """Return next sound of the sequence."""
+        if self.index < len(self):
+            sound = self.sounds[self.index]
+            self.index += 1
+            return sound
+        raise StopIteration
+
+    def _parse(self) -> List[Sound]:
+        """Create of mapping of sounds to characters."""
+        orth = self.orth.lower()
+        index = 0
+
+        syllable = 1
+        stressed = False
+        sounds = []
+
+        for m in self.re_sounds.finditer(self.phon):
+            s = m.group()
+
+            # Keep track of stress.
+            if s == "'":
+                stressed = True
+                continue
+
+            # Keep track of syllable boundaries.
+            if s == "-":
+                syllable += 1
+                continue
+
+            sound = Sound(phone=s, start_char=index, syllable=syllable, stressed=False)
+
+            # Add stress to the first full vowel in the syllable.
+            if sound.is_full_vowel() and stressed:
+                sound = sound._replace(stressed=True)
+                stressed = False
+
+            for graph in self.phone_graph_map.get(s, [s]):
+                if orth.startswith(graph):
+                    sounds.append(sound)
+                    step = len(graph)
+                    orth = orth[step:]
+                    index += step
+
+        return sounds
+
+    def set_start_index(self) -> None:
+        """Set the index of the iterator to the first full vowel of the word."""
+        for i, sound in enumerate(self.sounds):
+            if sound.is_full_vowel():
+                self.index = i
+                return
+
+        # If the word only consists of consonants (which is very unlikely)
+        # jump directly to the end.
+        self.index = len(self)
+
+    def count_syllables(self) -> int:
+        """Return the number of syllables in the sound sequence."""
+        last_sound = self.sounds[-1]
+        return last_sound.syllable
+
+    def ends_with_schwa(self) -> bool:
+        """Return `True` if the last sound in the sequence is a schwa."""
+        last_sound = self.sounds[-1]
+        return last_sound.phone == "@"
+
+    def merge(self, other: "SoundSequence") -> Optional[str]:
+        """Merge another sound sequence into this one to form a compound."""
+        # The base word must have more than one syllable.
+        if self.count_syllables() < 2:
+            return None
+
+        # Short words ending in a schwa such as "Fahne" are no good bases.
+        if self.count_syllables() == 2 and self.ends_with_schwa():
+            return None
+
+        # The extra word may not be longer than the base word.
+        if other.count_syllables() > self.count_syllables():
+            return None
+
+        # For each of the words, get the position at which the first vowel is found.
+        self.set_start_index()
+        other.set_start_index()
+
+        # Compare words.
+        for snd1 in self:
+            # Get next sound.
+            snd2 = next(other)
+
+            dist = snd1.get_distance(snd2)
+
+            match = dist <= 1 or (dist == 2 and self.count_syllables() > 2)
+
+            if not match:
+                return None
+
+            if other.index == len(other):
+                break
+
+        # Uhu + huhu = Huhu
+        if self.index == len(self):
+            return other.orth.capitalize()
+
+        sound = self.sounds[self.index]
+        index = sound.start_char
+        s = other.orth + self.orth[index:]
+
+        return s.capitalize()
+
+
+def remove_last_syllable(phon: str) -> str:
+    """Remove the last syllable boundary in a phonetic string."""
+    # Find the last hyphen marking a syllable boundary and remove it.
+    i = phon.rfind("-")
+    j = i + 1
+    return phon[:i] + phon[j:]
+
+
+def get_stem(orth: str, phon: str, pos: Optional[str]) -> Tuple[str, str]:
+    """Get the stem of a lemma as `Lemma.get_stem` did."""
+    # Remove schwa sound from the end of a noun ("Fahne" becomes "Fahn").
+    if pos == "NN":
+        if phon.endswith("@"):
+            return remove_last_syllable(phon[:-1]), orth[:-1]
+
+    # Get verb stem by removing final -en or -n.
+    if pos == "VB":
+        if phon.endswith("@n"):
+            return remove_last_syllable(phon[:-2]), orth[:-2]
+        # "zappeln"
+        if phon.endswith("n"):
+            return phon[:-1], orth[:-1]
+
+    # Default: The stem is simply the full lemma.
+    return phon, orth
+
+
+@lru_cache(maxsize=None)
+def parse(orth: str, phon: str) -> SoundSequence:
+    """Parse a word once, `merge` works on copies of the result."""
+    return SoundSequence(orth, phon)
+
+
+def merge(base, extra) -> Optional[str]:
+    """Merge the lemma `extra` into the lemma `base` as `Lemma.merge` did."""
+    sound_seq_base = copy.copy(parse(base.orth, base.phon))
+
+    phon, orth = get_stem(extra.orth, extra.phon, extra.pos)
+    sound_seq_extra = copy.copy(parse(orth, phon))
+
+    return sound_seq_base.merge(sound_seq_extra)
+
+
+def generate_question(base, extra) -> str:
+    """Generate the question as `Generator.generate_question` did."""
+    is_properties: List[Optional[str]] = []
+
+    # If a color is specified, it should be mentioned first in the question.
+    color = extra.color or base.color
+    if color:
+        is_properties.append(color)
+
+    # Add additional properties.
+    is_properties.append(base.property)
+    is_properties.append(extra.property)
+    props = [prop for prop in is_properties if prop is not None]
+
+    # Add actions.
+    actions = [prop for prop in [base.action, extra.action] if prop is not None]
+
+    all_props = props + actions
+    predicates = ", ".join(all_props[:-1])
+
+    # Add a copula verb if there are properties that are adjectives.
+    if props:
+        predicates = "ist {}".format(predicates)
+
+    q = "Was {} und {}?".format(predicates, all_props[-1])
+
+    return q
+
+
+def generate_answer(base, compound: str) -> Optional[str]:
+    """Generate the answer as `Generator.generate_answer` did."""
+    det = base.determiner
+    if det:
+        a = str.format("{} {}.", det.capitalize(), compound)
+        return a
+    return None
@@ -0,0 +1,36 @@
+from banone.cache import LRUCache
+
+
+class TestLRUCache:
+    def test_get(self):
+        cache = LRUCache(2)
+        cache.put("a", 1)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_evict_least_recently_used(self):
+        cache = LRUCache(2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert len(cache) == 2
+
+    def test_disabled(self):
+        cache = LRUCache(0)
+        cache.put("a", 1)
+
+        assert cache.get("a") is None
+
+    def test_clear(self):
+        cache = LRUCache(2)
+        cache.put("a", 1)
+        cache.clear()
+
+        assert len(cache) == 0
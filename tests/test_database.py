@@ -0,0 +1,74 @@
+import pytest
+
+from banone.database import RiddleDatabase
+from banone.generator import Generator
+
+
+class TestRiddleDatabase:
+    @pytest.fixture(scope="class")
+    def fxt_generator(self, fxt_shared_dict_path):
+        return Generator(fxt_shared_dict_path)
+
+    @pytest.fixture
+    def fxt_database(self, fxt_generator, tmp_path):
+        database = RiddleDatabase(tmp_path / "riddles.db")
+        database.add_riddles(fxt_generator.iter_riddles(), fxt_generator.dict)
+        yield database
+        database.close()
+
+    def test_add_riddles(self, fxt_generator, tmp_path):
+        riddles = list(fxt_generator.iter_riddles())
+        with RiddleDatabase(tmp_path / "riddles.db") as database:
+            count = database.add_riddles(riddles, fxt_generator.dict, batch_size=10)
+
+            assert count == len(riddles)
+            assert database.find() == riddles
+
+        with RiddleDatabase(tmp_path / "riddles.db") as database:
+            assert database.count() == len(riddles)
+
+    def test_add_riddles_again(self, fxt_generator, fxt_database):
+        riddles = list(fxt_generator.iter_riddles())
+        fxt_database.add_riddles(riddles, fxt_generator.dict)
+
+        assert fxt_database.count() == len(riddles)
+        assert fxt_database.find() == riddles
+
+    def test_add_riddles_unknown_word(self, fxt_generator, tmp_path):
+        riddle = next(fxt_generator.iter_riddles())._replace(base="Banone")
+
+        with RiddleDatabase(tmp_path / "riddles.db") as database:
+            with pytest.raises(KeyError):
+                database.add_riddles([riddle], fxt_generator.dict)
+            assert database.count() == 0
+
+    def test_find(self, fxt_database):
+        riddles = fxt_database.find(color="gelb", base="Banane")
+
+        assert [riddle.compound for riddle in riddles] == [
+            "Fahnane",
+            "Schwanane",
+            "Spannane",
+        ]
+
+    @pytest.mark.parametrize(
+        ("kwargs", "compounds"),
+        [
+            ({"extra": "Fahne"}, {"Fahnane", "Fahninchen", "Fahndarine", "Fahndale"}),
+            ({"property": "krumm", "extra": "Banane"}, {"Bananas"}),
+            ({"base": "Banane", "limit": 1}, {"Fahnane"}),
+            ({"color": "lila"}, set()),
+        ],
+    )
+    def test_find_by(self, kwargs, compounds, fxt_database):
+        riddles = fxt_database.find(**kwargs)
+
+        assert {riddle.compound for riddle in riddles} == compounds
+
+    def test_indexes(self, fxt_database):
+        plan = fxt_database.connection.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM riddles WHERE base = ? AND color = ?",
+            ("Banane", "gelb"),
+        ).fetchall()
+
+        assert "USING INDEX" in plan[0][-1]
@@ -0,0 +1,180 @@
+import hashlib
+import pickle
+import random
+from pathlib import Path
+
+import pytest
+
+from banone.dictionary import Dictionary
+from banone.dictionary import MappedDictionary
+from banone.dictionary import compile_mapped
+from banone.dictionary import get_cache_path
+from banone.dictionary import load_dictionary
+
+
+class Touch:
+    """Object that creates a file when it is unpickled."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def __reduce__(self):
+        return (Path.touch, (self.path,))
+
+
+class TestDictionary:
+    @pytest.mark.parametrize(
+        ("extra_str", "base_str"),
+        [("Fahne", "Banane"), ("blöd", "Lötkolben"), ("Kamin", "Kaninchen")],
+    )
+    def test_iter_bases(self, extra_str, base_str, fxt_dict):
+        extra = fxt_dict.lookup(extra_str)
+        bases = [base.orth for base in fxt_dict.iter_bases(extra)]
+
+        assert base_str in bases
+
+    def test_iter_bases_complete(self, fxt_dict):
+        for extra in fxt_dict:
+            bases = list(fxt_dict.iter_bases(extra))
+            for base in fxt_dict.iter_nouns():
+                if base not in bases:
+                    assert base.merge(extra) is None
+
+    def test_iter_extras(self, fxt_dict):
+        for base in fxt_dict.iter_nouns():
+            extras = [extra.orth for extra in fxt_dict.iter_extras(base)]
+            expected = [
+                extra.orth for extra in fxt_dict if base in fxt_dict.iter_bases(extra)
+            ]
+
+            assert extras == expected
+
+    def test_iter_extras_not_noun(self, fxt_dict):
+        assert list(fxt_dict.iter_extras(fxt_dict.lookup("spannen"))) == []
+
+    def test_update(self):
+        dictionary = Dictionary(Path("banone/dict/de.yaml"), use_cache=False)
+        fahne = dictionary.lookup("Fahne")
+        kahn = dictionary.update(
+            "Kahn", {"phon": "'ka:n", "pos": "NN", "determiner": "ein"}
+        )
+
+        assert dictionary.lookup("Kahn") is kahn
+        assert kahn in dictionary.iter_bases(fahne)
+        assert fahne in dictionary.iter_extras(kahn)
+
+        dictionary.update("Kahn", {"phon": "'ka:n", "pos": "VB"})
+
+        assert kahn not in dictionary.iter_bases(fahne)
+        assert fahne not in dictionary.iter_extras(kahn)
+
+    def test_cache(self, fxt_dict_path):
+        dictionary = Dictionary(fxt_dict_path)
+
+        assert get_cache_path(fxt_dict_path).exists()
+
+        cached = Dictionary(fxt_dict_path)
+
+        assert list(cached.entries) == list(dictionary.entries)
+        assert cached.lookup("Banane").phon == dictionary.lookup("Banane").phon
+
+    def test_cache_invalidation(self, fxt_dict_path):
+        Dictionary(fxt_dict_path)
+
+        with fxt_dict_path.open("a", encoding="utf-8") as f:
+            f.write('\nZebra:\n    phon: "\'tse:-bRa"\n    pos: NN\n')
+
+        assert Dictionary(fxt_dict_path).lookup("Zebra") is not None
+
+    @pytest.mark.parametrize("seed", range(20))
+    def test_corrupted_cache(self, seed, fxt_dict_path):
+        Dictionary(fxt_dict_path)
+        cache_path = get_cache_path(fxt_dict_path)
+        data = bytearray(cache_path.read_bytes())
+
+        rng = random.Random(seed)
+        for _ in range(8):
+            data[rng.randrange(len(data))] = rng.randrange(256)
+        cache_path.write_bytes(bytes(data))
+
+        assert Dictionary(fxt_dict_path).lookup("Banane").phon == "ba-'na:-n@"
+
+    def test_cache_pickle(self, fxt_dict_path, tmp_path):
+        # A cache in the old pickle format must not be able to run any code.
+        marker = tmp_path / "marker"
+        digest = hashlib.sha256(fxt_dict_path.read_bytes()).hexdigest()
+        payload = pickle.dumps((6, digest)) + pickle.dumps(Touch(marker))
+        get_cache_path(fxt_dict_path).write_bytes(payload)
+
+        assert Dictionary(fxt_dict_path).lookup("Banane").phon == "ba-'na:-n@"
+        assert not marker.exists()
+
+    def test_cache_temporary_files(self, fxt_dict_path):
+        Dictionary(fxt_dict_path)
+        Dictionary(fxt_dict_path, use_cache=True)
+
+        assert sorted(p.name for p in fxt_dict_path.parent.iterdir()) == [
+            "de.cache",
+            "de.yaml",
+        ]
+
+    def test_no_cache(self, fxt_dict_path):
+        Dictionary(fxt_dict_path, use_cache=False)
+
+        assert not get_cache_path(fxt_dict_path).exists()
+
+
+class TestMappedDictionary:
+    @pytest.fixture(scope="class")
+    def fxt_mapped_dict(self, tmp_path_factory):
+        path = tmp_path_factory.mktemp("mapped") / "de.lex"
+        compile_mapped(Path("banone/dict/de.yaml"), path)
+        return MappedDictionary(path)
+
+    def test_iter(self, fxt_mapped_dict, fxt_dict):
+        mapped = [(lemma.orth, lemma.to_dict()) for lemma in fxt_mapped_dict]
+
+        assert mapped == [(lemma.orth, lemma.to_dict()) for lemma in fxt_dict]
+
+    def test_lookup(self, fxt_mapped_dict, fxt_dict):
+        for lemma in fxt_dict:
+            assert fxt_mapped_dict.lookup(lemma.orth).to_dict() == lemma.to_dict()
+
+        assert fxt_mapped_dict.lookup("Banone") is None
+
+    def test_iter_bases(self, fxt_mapped_dict, fxt_dict):
+        for extra in fxt_dict:
+            mapped = [base.orth for base in fxt_mapped_dict.iter_bases(extra)]
+
+            assert mapped == [base.orth for base in fxt_dict.iter_bases(extra)]
+
+    def test_iter_extras(self, fxt_mapped_dict, fxt_dict):
+        for base in fxt_dict.iter_nouns():
+            mapped = [extra.orth for extra in fxt_mapped_dict.iter_extras(base)]
+
+            assert mapped == [extra.orth for extra in fxt_dict.iter_extras(base)]
+
+    def test_parsed_sounds(self, fxt_mapped_dict, fxt_dict):
+        for lemma in fxt_dict:
+            mapped = fxt_mapped_dict.lookup(lemma.orth)
+
+            assert mapped.get_sound_sequence().codes == (
+                lemma.get_sound_sequence().codes
+            )
+            assert mapped.get_stem_sound_sequence().codes == (
+                lemma.get_stem_sound_sequence().codes
+            )
+
+    def test_reuse_lemmas(self, fxt_mapped_dict):
+        assert fxt_mapped_dict.lookup("Banane") is fxt_mapped_dict.lookup("Banane")
+
+    def test_update(self, fxt_mapped_dict):
+        with pytest.raises(TypeError):
+            fxt_mapped_dict.update("Kahn", {"phon": "'ka:n", "pos": "NN"})
+
+    def test_load_dictionary(self, fxt_dict_path, tmp_path):
+        target = tmp_path / "de.lex"
+        compile_mapped(fxt_dict_path, target)
+
+        assert isinstance(load_dictionary(target), MappedDictionary)
+        assert not isinstance(load_dictionary(fxt_dict_path), MappedDictionary)
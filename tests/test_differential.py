@@ -0,0 +1,182 @@
+import time
+from collections import Counter
+
+import pytest
+
+from banone.dictionary import compile_mapped
+from banone.generator import Generator
+from banone.generator import Riddle
+from banone.store import ResultStore
+from banone.sound import set_near_matches
+from benchmarks.lexicon import write_lexicon
+from tests import reference
+
+
+def reference_riddles(gen):
+    """Generate all riddles by merging every word into every noun.
+
+    The words are merged and the riddles are formatted by the frozen copy of
+    the original implementation in `tests/reference.py`.
+    """
+    riddles = []
+    for extra in gen.dict:
+        for base in gen.dict.iter_nouns():
+            if base.orth == extra.orth:
+                continue
+            compound = reference.merge(base, extra)
+            if compound:
+                q = reference.generate_question(base, extra)
+                a = reference.generate_answer(base, compound)
+                riddles.append(Riddle(base.orth, extra.orth, compound, q, a))
+    return riddles
+
+
+def merged_riddles(gen):
+    """Generate all riddles by trying `make_riddle` on every pair of words."""
+    return [
+        riddle
+        for extra in gen.dict
+        for base in gen.dict.iter_nouns()
+        if base.orth != extra.orth
+        for riddle in [gen.make_riddle(base, extra)]
+        if riddle
+    ]
+
+
+def diff_riddles(expected, actual):
+    """Return the riddles that are missing and those that are unexpected."""
+    expected_counts = Counter(expected)
+    actual_counts = Counter(actual)
+    return expected_counts - actual_counts, actual_counts - expected_counts
+
+
+def run_indexed(gen, tmp_path, count):
+    return list(gen.iter_riddles())
+
+
+def run_parallel(gen, tmp_path, count):
+    return list(gen.iter_riddles(processes=2))
+
+
+def run_vectorized(gen, tmp_path, count):
+    pytest.importorskip("numpy")
+    return list(gen.iter_riddles(vectorized=True))
+
+
+def run_mapped(gen, tmp_path, count):
+    path = tmp_path / "dict.lex"
+    compile_mapped(gen.dict_path, path)
+    return list(Generator(path).iter_riddles())
+
+
+def run_store(gen, tmp_path, count):
+    return ResultStore(tmp_path / "store.json").update(gen)
+
+
+def run_partners(gen, tmp_path, count):
+    return [
+        riddle
+        for lemma in gen.dict
+        for riddle in gen.find_partners(lemma.orth)
+        if riddle.base == lemma.orth
+    ]
+
+
+def run_scored(gen, tmp_path, count):
+    return [riddle for _, riddle in gen.iter_scored_riddles()]
+
+
+def run_top(gen, tmp_path, count):
+    return [riddle for _, riddle in gen.top_riddles(count)]
+
+
+def run_sample(gen, tmp_path, count):
+    return gen.sample_riddles(count, seed=0)
+
+
+# Engines that have to give the same riddles as the reference. Each gets the
+# generator, a temporary directory and the number of riddles to expect.
+engines = {
+    "indexed": run_indexed,
+    "parallel": run_parallel,
+    "vectorized": run_vectorized,
+    "mapped": run_mapped,
+    "store": run_store,
+    "partners": run_partners,
+    "scored": run_scored,
+    "top": run_top,
+    "sample": run_sample,
+}
+
+
+class TestDifferential:
+    @pytest.fixture(params=["de", "synthetic-1", "synthetic-2"])
+    def fxt_lexicon_path(self, request, tmp_path):
+        if request.param == "de":
+            return request.getfixturevalue("fxt_dict_path")
+
+        seed = int(request.param.split("-")[1])
+        path = tmp_path / "synthetic.yaml"
+        write_lexicon(path, 300, seed=seed)
+        return path
+
+    @pytest.fixture(scope="class")
+    def fxt_references(self):
+        # The reference riddles and their run time by lexicon content, so that
+        # the slow reference only runs once for each lexicon.
+        return {}
+
+    def get_reference(self, references, path):
+        key = path.read_bytes()
+        if key not in references:
+            start = time.perf_counter()
+            expected = reference_riddles(Generator(path))
+            references[key] = expected, time.perf_counter() - start
+        return references[key]
+
+    @pytest.mark.parametrize("engine", sorted(engines))
+    def test_engine(
+        self, engine, fxt_lexicon_path, fxt_references, tmp_path, record_property
+    ):
+        expected, reference_time = self.get_reference(fxt_references, fxt_lexicon_path)
+
+        # Use a fresh generator so that nothing is reused from the reference.
+        gen = Generator(fxt_lexicon_path)
+        start = time.perf_counter()
+        actual = engines[engine](gen, tmp_path, len(expected))
+        engine_time = time.perf_counter() - start
+
+        record_property("speedup", reference_time / max(engine_time, 1e-9))
+
+        missing, unexpected = diff_riddles(expected, actual)
+        assert not missing, "riddles missing from {}".format(engine)
+        assert not unexpected, "unexpected riddles from {}".format(engine)
+
+    def test_reference(self, fxt_lexicon_path, fxt_references):
+        expected, _ = self.get_reference(fxt_references, fxt_lexicon_path)
+
+        assert expected
+        assert len(set(expected)) == len(expected)
+
+    def test_diff_riddles(self, fxt_lexicon_path, fxt_references):
+        expected, _ = self.get_reference(fxt_references, fxt_lexicon_path)
+        actual = expected[1:] + expected[:1] * 2
+
+        missing, unexpected = diff_riddles(expected, actual)
+
+        assert not missing
+        assert list(unexpected) == expected[:1]
+        assert list(diff_riddles(expected, expected[1:])[0]) == expected[:1]
+
+    @pytest.mark.parametrize("engine", sorted(engines))
+    def test_near_matches(self, engine, fxt_lexicon_path, fxt_near_matches, tmp_path):
+        # Vowels and chained pairs, which have to end up in the same classes.
+        set_near_matches([("a:", "o:"), ("m", "n"), ("n", "N"), ("t", "k")])
+        gen = Generator(fxt_lexicon_path)
+        expected = merged_riddles(gen)
+
+        actual = engines[engine](gen, tmp_path, len(expected))
+
+        missing, unexpected = diff_riddles(expected, actual)
+        assert not missing, "riddles missing from {}".format(engine)
+        assert not unexpected, "unexpected riddles from {}".format(engine)
@@ -1,16 +1,22 @@
-from pathlib import Path
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
 
 import pytest
 
 from banone.generator import Generator
+from banone.generator import Riddle
 from banone.lemma import Lemma
+from banone.sound import get_sound_class
+from banone.sound import set_near_matches
 from tests.utils import load_test_data
 
 
 class TestGenerator:
     @pytest.fixture(scope="class")
-    def fxt_generator(self):
-        return Generator(Path("banone/dict/de.yaml"))
+    def fxt_generator(self, fxt_shared_dict_path):
+        return Generator(fxt_shared_dict_path)
 
     @pytest.mark.parametrize(
         ("base_str", "extra_str", "question"),
@@ -47,3 +53,241 @@ class TestGenerator:
         assert fxt_generator.generate_riddle(base, extra) == str.format(
             "{}\n{}", question, answer
         )
+
+    def test_generate_all_parallel(self, fxt_generator, capsys):
+        fxt_generator.generate_all()
+        serial = capsys.readouterr().out
+
+        fxt_generator.generate_all(processes=2)
+        parallel = capsys.readouterr().out
+
+        assert parallel == serial
+
+    def test_iter_riddles(self, fxt_generator):
+        riddle = next(fxt_generator.iter_riddles())
+        base = fxt_generator.dict.lookup(riddle.base)
+        extra = fxt_generator.dict.lookup(riddle.extra)
+
+        assert riddle.compound == base.merge(extra).orth
+        assert str(riddle) == fxt_generator.generate_riddle(base, extra)
+
+    @pytest.mark.parametrize(
+        ("base_str", "extra_str", "compound", "question", "answer"),
+        load_test_data(["base", "extra", "compound", "question", "answer"]),
+    )
+    def test_iter_riddles_complete(
+        self, base_str, extra_str, compound, question, answer, fxt_generator
+    ):
+        riddle = Riddle(base_str, extra_str, compound, question, answer)
+
+        assert riddle in fxt_generator.iter_riddles()
+
+    @pytest.mark.parametrize("word_str", ["Banane", "Fahne", "spannen", "Kamin"])
+    def test_find_partners(self, word_str, fxt_generator):
+        riddles = list(fxt_generator.iter_riddles())
+        expected = [r for r in riddles if r.base == word_str] + [
+            r for r in riddles if r.extra == word_str
+        ]
+
+        assert fxt_generator.find_partners(word_str) == expected
+        assert fxt_generator.find_partners(fxt_generator.dict.lookup(word_str)) == (
+            expected
+        )
+
+    def test_find_partners_cache(self, fxt_shared_dict_path):
+        gen = Generator(fxt_shared_dict_path, partner_cache_size=1)
+
+        first = gen.find_partners("Banane")
+        assert gen.find_partners("Banane") == first
+        assert gen.partner_cache.hits == 1
+
+        gen.find_partners("Fahne")
+        gen.find_partners("Banane")
+        assert gen.partner_cache.hits == 1
+        assert len(gen.partner_cache) == 1
+
+    def test_find_partners_unknown(self, fxt_generator):
+        with pytest.raises(KeyError):
+            fxt_generator.find_partners("Banone")
+
+    def test_find_partners_new_lemma(self, fxt_generator):
+        lemma = Lemma("Kahn", {"phon": "'ka:n", "pos": "NN", "determiner": "ein"})
+        riddles = fxt_generator.find_partners(lemma)
+
+        assert riddles
+        assert all(lemma.orth in (r.base, r.extra) for r in riddles)
+        assert fxt_generator.partner_cache.get("Kahn") is None
+
+    def test_update_lemma(self, fxt_shared_dict_path):
+        gen = Generator(fxt_shared_dict_path)
+        before = gen.find_partners("Fahne")
+
+        entry = {
+            "phon": "ka-'no:-n@",
+            "pos": "NN",
+            "determiner": "eine",
+            "action": "schießt",
+        }
+        gen.update_lemma("Kanone", entry)
+        after = gen.find_partners("Fahne")
+
+        assert [r for r in after if r.base != "Kanone"] == before
+        assert [r.compound for r in after if r.base == "Kanone"] == ["Fahnone"]
+
+    def test_memoized_question(self, fxt_generator):
+        base = fxt_generator.dict.lookup("Banane")
+        extra = fxt_generator.dict.lookup("Fahne")
+
+        fxt_generator.generate_question(base, extra)
+        hits = fxt_generator._format_question.cache_info().hits
+        question = fxt_generator.generate_question(base, extra)
+
+        assert question == "Was ist gelb, krumm und flattert im Wind?"
+        assert fxt_generator._format_question.cache_info().hits == hits + 1
+
+    def test_memo_size(self, fxt_shared_dict_path):
+        gen = Generator(fxt_shared_dict_path, memo_size=2)
+        list(gen.iter_riddles())
+
+        assert gen._format_question.cache_info().currsize == 2
+
+    def test_iter_scored_riddles(self, fxt_generator):
+        scored = list(fxt_generator.iter_scored_riddles())
+
+        assert [riddle for _, riddle in scored] == list(fxt_generator.iter_riddles())
+
+    @pytest.mark.parametrize("k", [0, 1, 5, 1000])
+    def test_top_riddles(self, k, fxt_generator):
+        scored = list(fxt_generator.iter_scored_riddles())
+        ranked = sorted(scored, key=lambda item: item[0].value, reverse=True)
+
+        assert fxt_generator.top_riddles(k) == ranked[:k]
+
+    def test_top_riddles_not_extra(self, fxt_generator):
+        top = fxt_generator.top_riddles(3)
+
+        assert [riddle.compound for _, riddle in top] == [
+            "Pudelauflauf",
+            "Telefant",
+            "Fluchtsalat",
+        ]
+        assert all(riddle.compound != riddle.extra for _, riddle in top)
+
+    def test_sample_riddles(self, fxt_generator):
+        riddles = list(fxt_generator.iter_riddles())
+        sample = fxt_generator.sample_riddles(len(riddles), seed=1)
+
+        assert sorted(sample) == sorted(riddles)
+
+    def test_sample_riddles_seed(self, fxt_generator):
+        first = fxt_generator.sample_riddles(3, seed=42)
+
+        assert fxt_generator.sample_riddles(3, seed=42) == first
+        assert len(set(first)) == 3
+
+    def test_sample_riddles_replace(self, fxt_generator):
+        riddles = list(fxt_generator.iter_riddles())
+        sample = fxt_generator.sample_riddles(100, seed=0, replace=True)
+
+        assert len(sample) == 100
+        assert set(sample) <= set(riddles)
+
+    def test_sample_riddles_too_many(self, fxt_generator):
+        count = sum(1 for _ in fxt_generator.iter_riddles())
+
+        with pytest.raises(ValueError):
+            fxt_generator.sample_riddles(count + 1)
+
+    def test_iter_fuzzy_riddles(self, fxt_generator):
+        riddles = list(fxt_generator.iter_riddles())
+        fuzzy = list(fxt_generator.iter_fuzzy_riddles())
+
+        assert [riddle.compound for riddle in fuzzy] == ["Ananas"]
+        assert not set(fuzzy) & set(riddles)
+        assert list(fxt_generator.iter_fuzzy_riddles(budget=0)) == []
+
+    def test_iter_riddles_threads(self, fxt_generator):
+        extras = list(fxt_generator.dict) * 4
+
+        def generate(extra):
+            return list(fxt_generator.iter_riddles_for_extra(extra))
+
+        with ThreadPoolExecutor(8) as executor:
+            riddles = list(chain.from_iterable(executor.map(generate, extras)))
+
+        assert riddles == list(fxt_generator.iter_riddles()) * 4
+
+    def test_agenerate(self, fxt_generator):
+        async def collect():
+            return [riddle async for riddle in fxt_generator.agenerate(chunk_size=7)]
+
+        assert asyncio.run(collect()) == list(fxt_generator.iter_riddles())
+
+    def test_agenerate_processes(self, fxt_generator):
+        async def collect(executor):
+            riddles = fxt_generator.agenerate(executor, queue_size=4, pending=4)
+            return [riddle async for riddle in riddles]
+
+        with ProcessPoolExecutor(2) as executor:
+            riddles = asyncio.run(collect(executor))
+
+        assert riddles == list(fxt_generator.iter_riddles())
+
+    def test_agenerate_backpressure(self, fxt_generator, monkeypatch):
+        riddle = next(fxt_generator.iter_riddles())
+        chunks = []
+
+        def riddles_for_orths(orths):
+            chunks.append(orths)
+            return [riddle] * 10
+
+        monkeypatch.setattr(fxt_generator, "_riddles_for_orths", riddles_for_orths)
+
+        async def take_one():
+            riddles = fxt_generator.agenerate(chunk_size=1, queue_size=5)
+            first = await riddles.__anext__()
+            await asyncio.sleep(0.1)
+            await riddles.aclose()
+            return first
+
+        assert asyncio.run(take_one()) == riddle
+        assert len(chunks) <= 3
+
+    def test_agenerate_cancel(self, fxt_generator):
+        async def cancel():
+            async def consume():
+                async for _ in fxt_generator.agenerate(chunk_size=1, queue_size=1):
+                    await asyncio.sleep(1)
+
+            task = asyncio.ensure_future(consume())
+            await asyncio.sleep(0.1)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            await asyncio.sleep(0.1)
+            return len(asyncio.all_tasks())
+
+        assert asyncio.run(cancel()) == 1
+
+    def test_agenerate_error(self, fxt_generator, monkeypatch):
+        def riddles_for_orths(orths):
+            raise ValueError(orths)
+
+        monkeypatch.setattr(fxt_generator, "_riddles_for_orths", riddles_for_orths)
+
+        async def collect():
+            return [riddle async for riddle in fxt_generator.agenerate()]
+
+        with pytest.raises(ValueError):
+            asyncio.run(collect())
+
+    def test_near_matches(self, fxt_generator, fxt_near_matches, fxt_dict_path):
+        riddles = list(fxt_generator.iter_riddles())
+        set_near_matches([("t", "k")])
+        gen = Generator(fxt_dict_path)
+        changed = list(gen.iter_riddles())
+
+        assert get_sound_class("n") == "n"
+        assert get_sound_class("k") == "t"
+        assert set(changed) != set(riddles)
+        assert list(gen.iter_riddles(processes=2)) == changed
@@ -1,6 +1,8 @@
 import pytest
 
 from banone.lemma import Lemma
+from banone.lemma import parse_lemmas
+from banone.sound import SoundSequence
 from tests.utils import load_test_data
 
 
@@ -101,3 +103,88 @@ class TestLemma:
         extra = fxt_dict.lookup(extra_str)
 
         assert base.merge(extra) is None
+
+    def test_parse_once(self, fxt_dict):
+        lemma = fxt_dict.lookup("Banane")
+
+        assert lemma.get_sound_sequence() is lemma.get_sound_sequence()
+        assert lemma.get_stem_sound_sequence() is lemma.get_stem_sound_sequence()
+
+    def test_merge_repeatedly(self, fxt_dict):
+        base = fxt_dict.lookup("Banane")
+        extra = fxt_dict.lookup("Fahne")
+        other = fxt_dict.lookup("Kamin")
+
+        assert base.merge(extra).orth == "Fahnane"
+        assert base.merge(other) is None
+        assert base.merge(extra).orth == "Fahnane"
+
+    def test_merge_scored_is_extra(self, fxt_dict):
+        base = fxt_dict.lookup("Vandale")
+        compound, score = base.merge_scored(fxt_dict.lookup("Randale"))
+
+        assert compound.orth == "Randale"
+        assert score.is_extra
+        assert not base.merge_scored(fxt_dict.lookup("Fahne"))[1].is_extra
+
+    @pytest.mark.parametrize(
+        ("base_str", "extra_str", "offset", "compound_str"),
+        [
+            ("Banane", "Fahne", 1, "Fahnane"),
+            ("Banane", "Schwan", 3, "Baschwane"),
+            ("Zebra", "Banane", 4, "Zebanan"),
+        ],
+    )
+    def test_merge_at(self, base_str, extra_str, offset, compound_str, fxt_dict):
+        base = fxt_dict.lookup(base_str)
+        extra = fxt_dict.lookup(extra_str)
+
+        assert base.merge_at(extra, offset).orth == compound_str
+
+    def test_shared_values(self, fxt_dict):
+        banane = fxt_dict.lookup("Banane")
+        ananas = fxt_dict.lookup("Ananas")
+
+        assert not hasattr(banane, "__dict__")
+        assert banane.color is ananas.color
+
+    def test_update(self):
+        lemma = Lemma("Fahne", {"phon": "'fa:-n@", "pos": "NN"})
+        assert lemma.get_stem() == ("'fa:n", "Fahn")
+        stem_seq = lemma.get_stem_sound_sequence()
+
+        lemma.update({"phon": "'fa:-n@", "pos": "VB"})
+
+        assert lemma.get_stem() == ("'fa:-n@", "Fahne")
+        assert lemma.get_stem_sound_sequence() is not stem_seq
+
+    def test_parse_lemmas(self):
+        zebra = Lemma("Zebra", {"phon": "'tse:-bRa", "pos": "NN"})
+        fahne = Lemma("Fahne", {"phon": "'fa:-n@", "pos": "NN"})
+        fahn = Lemma("Fahn", {"phon": "'fa:n", "pos": "ADJ"})
+        parse_lemmas([zebra, fahne, fahn])
+
+        assert zebra.get_stem_sound_sequence() is zebra.get_sound_sequence()
+        assert fahne.get_stem_sound_sequence() is fahn.get_sound_sequence()
+        assert fahne.get_sound_sequence().sounds == (
+            SoundSequence("Fahne", "'fa:-n@").sounds
+        )
+
+    @pytest.mark.parametrize(
+        ("orth", "lemma_dict"),
+        [
+            ("Fahne", {"phon": "'fa:-n@", "pos": "NN"}),
+            ("Zebra", {"phon": "'tse:-bRa", "pos": "NN"}),
+        ],
+    )
+    def test_pack_sounds(self, orth, lemma_dict):
+        lemma = Lemma(orth, lemma_dict)
+        copy = Lemma(orth, lemma_dict)
+        copy.unpack_sounds(lemma.pack_sounds())
+
+        assert copy.get_sound_sequence().sounds == lemma.get_sound_sequence().sounds
+        assert (
+            copy.get_stem_sound_sequence().sounds
+            == lemma.get_stem_sound_sequence().sounds
+        )
+        assert copy.get_stem_sound_sequence().orth == lemma.get_stem()[1]
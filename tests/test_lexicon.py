@@ -0,0 +1,17 @@
+from banone.lemma import Lemma
+from benchmarks.lexicon import is_aligned
+from benchmarks.lexicon import make_lexicon
+
+
+class TestLexicon:
+    def test_make_lexicon(self):
+        lexicon = make_lexicon(200, seed=1)
+
+        assert len(lexicon) == 200
+        assert make_lexicon(200, seed=1) == lexicon
+
+        for orth, lemma_dict in lexicon.items():
+            lemma = Lemma(orth, lemma_dict)
+
+            assert is_aligned(orth, lemma.phon)
+            assert lemma.color or lemma.property or lemma.action
@@ -0,0 +1,57 @@
+import sys
+import time
+
+import pytest
+
+from banone.generator import Generator
+from banone.main import main
+from banone.stats import stats
+
+
+class TestMain:
+    @pytest.mark.parametrize(
+        "argv",
+        [
+            ["--store", "riddles.json", "--top", "1"],
+            ["--top", "1", "--sample", "2"],
+            ["--store", "riddles.json", "--fuzzy"],
+            ["--top", "1", "--overlaps"],
+            ["--sample", "1", "-j", "2"],
+            ["--vectorized", "-j", "2"],
+            ["--seed", "1"],
+            ["--format", "sqlite"],
+        ],
+    )
+    def test_unsupported_options(self, argv, monkeypatch, capsys):
+        monkeypatch.setattr(sys, "argv", ["banone-run"] + argv)
+
+        with pytest.raises(SystemExit):
+            main()
+
+        assert "error" in capsys.readouterr().err
+
+    def test_top(self, fxt_shared_dict_path, monkeypatch, capsys):
+        argv = ["banone-run", "-d", str(fxt_shared_dict_path), "--top", "1"]
+        monkeypatch.setattr(sys, "argv", argv)
+
+        main()
+
+        assert "Pudelauflauf" in capsys.readouterr().out
+
+    def test_top_timed(self, fxt_shared_dict_path, monkeypatch, capsys):
+        top_riddles = Generator.top_riddles
+
+        def slow_top_riddles(gen, k):
+            time.sleep(0.05)
+            return top_riddles(gen, k)
+
+        monkeypatch.setattr(Generator, "top_riddles", slow_top_riddles)
+        monkeypatch.setattr(stats, "enabled", False)
+        argv = ["banone-run", "-d", str(fxt_shared_dict_path), "--top", "1", "--stats"]
+        monkeypatch.setattr(sys, "argv", argv)
+
+        try:
+            main()
+            assert stats.timings["generate all"] >= 0.05
+        finally:
+            stats.reset()
@@ -0,0 +1,43 @@
+import pytest
+
+from banone.overlap import OverlapIndex
+
+
+class TestOverlapIndex:
+    @pytest.fixture(scope="class")
+    def fxt_index(self, fxt_dict):
+        return OverlapIndex(fxt_dict)
+
+    @pytest.mark.parametrize(
+        ("base_str", "extra_str", "compound_str"),
+        [
+            ("Banane", "Schwan", "Baschwane"),
+            ("Krokodil", "Klo", "Kroklodil"),
+            ("Nudelauflauf", "schlau", "Nudelaufschlauf"),
+            ("Uhu", "huhu", "Uhuhu"),
+        ],
+    )
+    def test_find(self, base_str, extra_str, compound_str, fxt_index, fxt_dict):
+        base = fxt_dict.lookup(base_str)
+        extra = fxt_dict.lookup(extra_str)
+
+        compounds = [
+            base.merge_at(extra, offset).orth
+            for candidate, offset in fxt_index.find(extra)
+            if candidate is base and base.merge_at(extra, offset)
+        ]
+
+        assert compound_str in compounds
+
+    def test_find_complete(self, fxt_index, fxt_dict):
+        for extra in fxt_dict:
+            candidates = set(
+                (base.orth, offset) for base, offset in fxt_index.find(extra)
+            )
+            for base in fxt_dict.iter_nouns():
+                if base.orth == extra.orth:
+                    continue
+                seq = base.get_sound_sequence()
+                for offset in range(seq.start_index + 1, len(seq)):
+                    if base.merge_at(extra, offset):
+                        assert (base.orth, offset) in candidates
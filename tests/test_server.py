@@ -0,0 +1,105 @@
+import io
+import json
+import socket
+import tempfile
+import threading
+from pathlib import Path
+
+import pytest
+
+from banone.generator import Generator
+from banone.server import RiddleServer
+
+
+class TestRiddleServer:
+    @pytest.fixture(scope="class")
+    def fxt_server(self, fxt_shared_dict_path):
+        return RiddleServer(Generator(fxt_shared_dict_path))
+
+    def test_random(self, fxt_server):
+        response = fxt_server.handle({"cmd": "random", "id": 7})
+
+        assert response["id"] == 7
+        assert response["riddle"]["compound"] in {
+            riddle.compound for riddle in fxt_server.gen.iter_riddles()
+        }
+
+    def test_word(self, fxt_server):
+        response = fxt_server.handle({"cmd": "word", "word": "Banane"})
+        compounds = [riddle["compound"] for riddle in response["riddles"]]
+
+        assert compounds == ["Fahnane", "Schwanane", "Spannane", "Bananas"]
+
+    def test_word_unknown(self, fxt_server):
+        assert "error" in fxt_server.handle({"cmd": "word", "word": "Xyz"})
+
+    def test_top(self, fxt_server):
+        response = fxt_server.handle({"cmd": "top", "k": 2})
+
+        riddles = response["riddles"]
+
+        assert [r["compound"] for r in riddles] == ["Pudelauflauf", "Telefant"]
+        assert riddles[0]["score"]["overlap"] == 4
+
+    @pytest.mark.parametrize(
+        "line",
+        ['{"cmd": "foo"}', "no json", "[1, 2]"],
+    )
+    def test_handle_line_error(self, fxt_server, line):
+        assert "error" in json.loads(fxt_server.handle_line(line))
+
+    def test_top_bounded(self, fxt_shared_dict_path):
+        server = RiddleServer(Generator(fxt_shared_dict_path), max_top=3)
+        response = server.handle({"cmd": "top", "k": 10})
+
+        assert len(server.ranked) == 3
+        assert len(response["riddles"]) == 3
+
+    @pytest.mark.parametrize("k", [None, -1, "2", True])
+    def test_top_invalid(self, fxt_server, k):
+        line = json.dumps({"cmd": "top", "k": k, "id": 1})
+        response = json.loads(fxt_server.handle_line(line))
+
+        assert "error" in response
+        assert response["id"] == 1
+
+    def test_handle_line_exception(self, fxt_server, monkeypatch):
+        def handle(request):
+            raise TypeError("broken")
+
+        monkeypatch.setattr(fxt_server, "handle", handle)
+        response = json.loads(fxt_server.handle_line('{"cmd": "random", "id": 3}'))
+
+        assert response == {"error": "broken", "id": 3}
+
+    def test_serve_stdio(self, fxt_server):
+        requests = "".join(
+            json.dumps({"cmd": "top", "k": 1, "id": i}) + "\n" for i in range(10)
+        )
+        outfile = io.StringIO()
+
+        fxt_server.serve_stdio(io.StringIO(requests), outfile)
+        responses = [json.loads(line) for line in outfile.getvalue().splitlines()]
+
+        assert sorted(response["id"] for response in responses) == list(range(10))
+
+    @pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="no Unix sockets")
+    def test_serve_unix(self, fxt_server):
+        path = Path(tempfile.mkdtemp()) / "banone.sock"
+
+        # Leave a stale socket file behind as a crashed server would.
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stale:
+            stale.bind(str(path))
+
+        thread = threading.Thread(
+            target=fxt_server.serve_unix, args=(path,), daemon=True
+        )
+        thread.start()
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            while client.connect_ex(str(path)) != 0:
+                thread.join(0.01)
+            client.sendall(b'{"cmd": "word", "word": "Fahne", "id": 1}\n')
+            response = json.loads(client.makefile("rb").readline())
+
+        assert response["id"] == 1
+        assert response["riddles"][0]["compound"] == "Fahnane"
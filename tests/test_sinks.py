@@ -0,0 +1,75 @@
+import csv
+import gzip
+import io
+import json
+
+import pytest
+
+from banone.generator import Riddle
+from banone.sinks import CsvSink
+from banone.sinks import JsonlSink
+from banone.sinks import RiddleSink
+from banone.sinks import TextSink
+from banone.sinks import open_sink
+
+riddles = [
+    Riddle(
+        "Banane",
+        "Fahne",
+        "Fahnane",
+        "Was ist gelb, krumm und flattert im Wind?",
+        "Eine Fahnane.",
+    ),
+    Riddle("Zebra", "Zelt", "Zelbra", "Was ist gestreift und wird aufgebaut?", None),
+]
+
+
+class TestSinks:
+    def test_abstract(self):
+        with pytest.raises(TypeError):
+            RiddleSink(io.StringIO())
+
+    def test_text(self, capsys):
+        file = io.StringIO()
+        with TextSink(file, close_file=False) as sink:
+            sink.write_all(riddles)
+
+        for riddle in riddles:
+            print(str(riddle) + "\n")
+        assert file.getvalue() == capsys.readouterr().out
+
+    def test_jsonl(self):
+        file = io.StringIO()
+        with JsonlSink(file, close_file=False) as sink:
+            assert sink.write_all(riddles) == 2
+
+        records = [json.loads(line) for line in file.getvalue().splitlines()]
+        assert [Riddle(**record) for record in records] == riddles
+
+    def test_csv(self):
+        file = io.StringIO()
+        with CsvSink(file, close_file=False) as sink:
+            sink.write_all(riddles)
+
+        rows = list(csv.DictReader(io.StringIO(file.getvalue())))
+        assert rows[0] == riddles[0]._asdict()
+        assert rows[1]["answer"] == ""
+
+    @pytest.mark.parametrize("fmt", ["text", "jsonl", "csv"])
+    def test_open_sink_gzip(self, fmt, tmp_path):
+        path = tmp_path / "riddles.gz"
+        with open_sink(fmt, path) as sink:
+            sink.write_all(riddles)
+
+        plain_path = tmp_path / "riddles.txt"
+        with open_sink(fmt, plain_path) as sink:
+            sink.write_all(riddles)
+
+        with gzip.open(path, "rb") as f:
+            assert f.read() == plain_path.read_bytes()
+
+    def test_open_sink_stdout(self, capsys):
+        with open_sink("jsonl") as sink:
+            sink.write_all(riddles[:1])
+
+        assert json.loads(capsys.readouterr().out)["compound"] == "Fahnane"
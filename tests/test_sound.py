@@ -1,7 +1,37 @@
+import pickle
+import random
+
 import pytest
 
+from banone.sound import MergeScore
+from banone.sound import PhoneTable
 from banone.sound import Sound
 from banone.sound import SoundSequence
+from banone.sound import get_sound_class
+from banone.sound import get_sound_classes
+from benchmarks.lexicon import make_word
+
+
+@pytest.mark.parametrize(
+    ("phone", "sound_class"),
+    [("a", "a"), ("a:", "a"), ("aU", "aU"), ("n", "m"), ("m", "m"), ("pf", "p")],
+)
+def test_get_sound_class(phone, sound_class):
+    assert get_sound_class(phone) == sound_class
+
+
+@pytest.mark.parametrize(
+    ("pairs", "sound_classes"),
+    [
+        ([("m", "n"), ("n", "N")], {"n": "m", "N": "m"}),
+        ([("n", "N"), ("m", "n")], {"n": "m", "N": "m"}),
+        ([("a:", "o:"), ("o", "u")], {"o": "a", "u": "a"}),
+        ([("m", "n"), ("n", "m")], {"n": "m"}),
+        ([], {}),
+    ],
+)
+def test_get_sound_classes(pairs, sound_classes):
+    assert get_sound_classes(pairs) == sound_classes
 
 
 class TestSound:
@@ -23,6 +53,54 @@ class TestSound:
 
         assert sound.is_full_vowel() == is_full_vowel
 
+    @pytest.mark.parametrize(
+        ("phone1", "stressed1", "phone2", "stressed2", "distance"),
+        [
+            ("a", False, "a", True, 0),
+            ("a:", True, "a", False, 1),
+            ("a", False, "a:", True, 1),
+            ("a:", True, "a", True, 100),
+            ("m", False, "n", False, 2),
+            ("R", False, "l", False, 2),
+            ("pf", False, "p", False, 2),
+            ("a", False, "o", False, 100),
+        ],
+    )
+    def test_get_distance(self, phone1, stressed1, phone2, stressed2, distance):
+        sound1 = Sound(phone1, 0, 1, stressed1)
+        sound2 = Sound(phone2, 0, 1, stressed2)
+
+        assert sound1.get_distance(sound2) == distance
+        assert sound2.get_distance(sound1) == distance
+
+
+class TestPhoneTable:
+    def test_intern(self):
+        table = PhoneTable(["a", "b"], [])
+
+        assert table.intern("a") == 0
+        assert table.intern("c") == 2
+        assert table.phones == ["a", "b", "c"]
+        assert len(table.distances) == 6
+        assert all(len(row) == 6 for row in table.distances)
+
+    def test_near_matches(self):
+        table = PhoneTable(["a", "o", "m", "n"], [("a", "o")])
+        a, o = table.encode("a", False), table.encode("o", True)
+        m, n = table.encode("m", False), table.encode("n", False)
+
+        assert table.distances[a][o] == 2
+        assert table.distances[m][n] == 100
+
+    def test_set_near_matches(self):
+        table = PhoneTable(["a", "o", "m", "n"], [("a", "o")])
+        a, o = table.encode("a", False), table.encode("o", True)
+        m, n = table.encode("m", False), table.encode("n", False)
+        table.set_near_matches([("m", "n")])
+
+        assert table.distances[a][o] == 100
+        assert table.distances[m][n] == 2
+
 
 class TestSoundSequence:
     @pytest.mark.parametrize(
@@ -129,7 +207,57 @@ class TestSoundSequence:
 
         assert sound_seq.orth == orth
         assert sound_seq.phon == phon
-        assert sound_seq.sounds == sounds
+        assert sound_seq.sounds == tuple(sounds)
+
+    @staticmethod
+    def parse_by_slicing(orth, phon):
+        """Parse the sounds like the original implementation of `_parse`."""
+        orth = orth.lower()
+        index = 0
+        syllable = 1
+        stressed = False
+        sounds = []
+
+        for m in SoundSequence.re_sounds.finditer(phon):
+            s = m.group()
+            if s == "'":
+                stressed = True
+                continue
+            if s == "-":
+                syllable += 1
+                continue
+
+            sound = Sound(phone=s, start_char=index, syllable=syllable, stressed=False)
+            if sound.is_full_vowel() and stressed:
+                sound = sound._replace(stressed=True)
+                stressed = False
+
+            for graph in SoundSequence.phone_graph_map.get(s, [s]):
+                if orth.startswith(graph):
+                    sounds.append(sound)
+                    step = len(graph)
+                    orth = orth[step:]
+                    index += step
+
+        return sounds
+
+    def test_parse_same_as_slicing(self, fxt_dict):
+        rng = random.Random(0)
+        words = [(lemma.orth, lemma.phon) for lemma in fxt_dict]
+        words += [make_word(rng, pos) for pos in ["NN", "VB", "ADJ"] * 1000]
+        # Phones that take up more than one graph.
+        words += [("Mitte", "'mI-t@"), ("Stadtt", "'Stat")]
+
+        for orth, phon in words:
+            expected = self.parse_by_slicing(orth, phon)
+
+            assert list(SoundSequence(orth, phon).sounds) == expected
+
+    def test_shared_sounds(self):
+        sound_seq1 = SoundSequence("Ananas", "a-na-nas")
+        sound_seq2 = SoundSequence("Ananas", "a-na-nas")
+
+        assert sound_seq1.sounds[0] is sound_seq2.sounds[0]
 
     @pytest.mark.parametrize(
         ("orth", "phon", "index", "phone"),
@@ -139,19 +267,28 @@ class TestSoundSequence:
             ("blau", "blaU", 2, "aU"),
         ],
     )
-    def test_next(self, orth, phon, index, phone):
+    def test_cursor(self, orth, phon, index, phone):
         sound_seq = SoundSequence(orth, phon)
-        sound_seq.index = index
+        cursor = sound_seq.cursor(index)
 
-        assert next(sound_seq).phone == phone
+        assert next(cursor).phone == phone
+        assert cursor.index == index + 1
 
     @pytest.mark.parametrize(("orth", "phon", "index"), [("Ananas", "a-na-nas", 6)])
-    def test_next_at_end_of_list(self, orth, phon, index):
+    def test_cursor_at_end_of_list(self, orth, phon, index):
         sound_seq = SoundSequence(orth, phon)
-        sound_seq.index = index
 
         with pytest.raises(StopIteration):
-            next(sound_seq)
+            next(sound_seq.cursor(index))
+
+    def test_independent_cursors(self):
+        sound_seq = SoundSequence("Ananas", "a-na-nas")
+        cursor1 = iter(sound_seq)
+        cursor2 = iter(sound_seq)
+        next(cursor1)
+
+        assert next(cursor2).phone == "a"
+        assert [sound.phone for sound in cursor1] == ["n", "a", "n", "a", "s"]
 
     @pytest.mark.parametrize(
         ("orth", "phon", "index"),
@@ -162,11 +299,38 @@ class TestSoundSequence:
             ("b", "b", 1),
         ],
     )
-    def test_set_start_index(self, orth, phon, index):
+    def test_start_index(self, orth, phon, index):
         sound_seq = SoundSequence(orth, phon)
-        sound_seq.set_start_index()
 
-        assert sound_seq.index == index
+        assert sound_seq.start_index == index
+
+    def test_immutable(self):
+        sound_seq = SoundSequence("Banane", "ba-'na:-n@")
+
+        with pytest.raises(AttributeError):
+            sound_seq.start_index = 0
+        with pytest.raises(AttributeError):
+            del sound_seq.sounds
+
+    def test_pickle(self):
+        sound_seq = SoundSequence("Banane", "ba-'na:-n@")
+        copy = pickle.loads(pickle.dumps(sound_seq))
+
+        assert copy.sounds == sound_seq.sounds
+        assert copy.codes == sound_seq.codes
+        assert copy.start_index == sound_seq.start_index
+        assert copy.merge(SoundSequence("Fahn", "'fa:n")) == "Fahnane"
+
+    def test_pack(self, fxt_dict):
+        for lemma in fxt_dict:
+            sound_seq = lemma.get_sound_sequence()
+            copy = SoundSequence.unpack(lemma.orth, lemma.phon, sound_seq.pack())
+
+            assert copy.sounds == sound_seq.sounds
+            assert copy.codes == sound_seq.codes
+            assert copy.full_vowels == sound_seq.full_vowels
+            assert copy.start_index == sound_seq.start_index
+            assert copy.syllable_count == sound_seq.syllable_count
 
     @pytest.mark.parametrize(
         ("orth", "phon", "count"),
@@ -195,3 +359,89 @@ class TestSoundSequence:
         sound_seq = SoundSequence(orth, phon)
 
         assert sound_seq.ends_with_schwa() == ends_with_schwa
+
+    @pytest.mark.parametrize(
+        ("base", "extra", "compound", "score"),
+        [
+            (
+                ("Banane", "ba-'na:-n@"),
+                ("Fahn", "'fa:n"),
+                "Fahnane",
+                MergeScore(1, 2, False, 1 / 3),
+            ),
+            (
+                ("Kaninchen", "ka-'ni:n-C@n"),
+                ("Kamin", "ka-'mi:n"),
+                "Kaminchen",
+                MergeScore(2, 4, True, 2 / 3),
+            ),
+        ],
+    )
+    def test_merge_scored(self, base, extra, compound, score):
+        base_seq = SoundSequence(*base)
+        extra_seq = SoundSequence(*extra)
+
+        assert base_seq.merge_scored(extra_seq) == (compound, score)
+        assert base_seq.merge(extra_seq) == compound
+
+    def test_merge_scored_is_extra(self):
+        _, score = SoundSequence("Uhu", "'u-hu").merge_scored(
+            SoundSequence("huhu", "'hu-hu")
+        )
+
+        assert score.is_extra
+        assert score.value == float("-inf")
+
+    def test_merge_scored_without_vowel(self):
+        base_seq = SoundSequence("Pst", "p-st")
+        extra_seq = SoundSequence("Ast", "ast")
+        compound, score = base_seq.merge_scored(extra_seq)
+
+        assert compound == base_seq.merge(extra_seq)
+        assert score.overlap == 0
+        assert not score.stressed_match
+
+    def test_merge_scored_fail(self):
+        base_seq = SoundSequence("Banane", "ba-'na:-n@")
+        extra_seq = SoundSequence("Kuh", "'ku:")
+
+        assert base_seq.merge_scored(extra_seq) is None
+
+    @pytest.mark.parametrize(
+        ("base", "extra", "kwargs", "compound"),
+        [
+            (("Apfelsine", "a-pf@l-'zi:-n@"), ("Hapfl", "'hapfl"), {}, "Hapflsine"),
+            (("Banane", "ba-'na:-n@"), ("Fahn", "'fa:n"), {}, "Fahnane"),
+            (
+                ("Apfelsine", "a-pf@l-'zi:-n@"),
+                ("Hapfl", "'hapfl"),
+                {"budget": 1},
+                "Hapflsine",
+            ),
+            (("Apfelsine", "a-pf@l-'zi:-n@"), ("Hapfl", "'hapfl"), {"band": 0}, None),
+            (("Apfelsine", "a-pf@l-'zi:-n@"), ("Hapfl", "'hapfl"), {"budget": 0}, None),
+            (("Kamin", "ka-'mi:n"), ("Spann", "'Span"), {}, None),
+            (("Banane", "ba-'na:-n@"), ("Kuh", "'ku:"), {}, None),
+        ],
+    )
+    def test_merge_fuzzy(self, base, extra, kwargs, compound):
+        base_seq = SoundSequence(*base)
+        extra_seq = SoundSequence(*extra)
+
+        assert base_seq.merge_fuzzy(extra_seq, **kwargs) == compound
+
+    def test_merge_fuzzy_without_vowel(self):
+        base_seq = SoundSequence("Pst", "p-st")
+        extra_seq = SoundSequence("Ast", "ast")
+
+        assert base_seq.merge_fuzzy(extra_seq) == base_seq.merge(extra_seq) == "Ast"
+
+    def test_merge_fuzzy_cutoff(self):
+        base_seq = SoundSequence("Apfelsine", "a-pf@l-'zi:-n@")
+        extra_seq = SoundSequence("Hapfl", "'hapfl")
+
+        assert base_seq._align_banded(extra_seq, base_seq.start_index, 2, 1, 1) == (
+            4,
+            1,
+        )
+        assert base_seq._align_banded(extra_seq, base_seq.start_index, 0, 1, 1) is None
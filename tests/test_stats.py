@@ -0,0 +1,114 @@
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from banone.generator import Generator
+from banone.stats import stats
+from banone.store import ResultStore
+
+
+class TestPipelineStats:
+    @pytest.fixture
+    def fxt_stats(self):
+        stats.reset()
+        stats.enabled = True
+        yield stats
+        stats.enabled = False
+        stats.reset()
+
+    @pytest.mark.parametrize(
+        ("base_str", "extra_str", "reason"),
+        [
+            ("Schwan", "Knast", "base too short"),
+            ("Fahne", "Schwan", "base ends in schwa"),
+            ("Pudel", "Nudelauflauf", "extra longer than base"),
+            ("Tannzapfen", "Fahne", "sound distance"),
+        ],
+    )
+    def test_rejections(self, base_str, extra_str, reason, fxt_stats, fxt_dict):
+        base = fxt_dict.lookup(base_str)
+        extra = fxt_dict.lookup(extra_str)
+
+        assert base.merge(extra) is None
+        assert fxt_stats.rejections == {reason: 1}
+
+    def test_disabled(self, fxt_dict):
+        base = fxt_dict.lookup("Kamin")
+        extra = fxt_dict.lookup("Schwan")
+
+        assert base.merge(extra) is None
+        assert not stats.rejections
+
+    def test_threads(self, fxt_stats, fxt_dict):
+        base = fxt_dict.lookup("Tannzapfen")
+        extra = fxt_dict.lookup("Fahne")
+
+        def merge_all(_):
+            for _ in range(1000):
+                base.merge(extra)
+                fxt_stats.count("merges")
+
+        with ThreadPoolExecutor(8) as executor:
+            list(executor.map(merge_all, range(8)))
+
+        assert fxt_stats.counts == {"merges": 8000}
+        assert fxt_stats.rejections == {"sound distance": 8000}
+
+    def test_pickle(self, fxt_stats):
+        fxt_stats.count("riddles", 3)
+        fxt_stats.reject("same word")
+
+        copied = pickle.loads(pickle.dumps(fxt_stats))
+        copied.count("riddles")
+
+        assert copied.counts == {"riddles": 4}
+        assert copied.rejections == {"same word": 1}
+        assert fxt_stats.counts == {"riddles": 3}
+
+    @pytest.mark.parametrize("engine", ["vectorized", "scored", "pairs", "store"])
+    def test_engines(self, engine, fxt_stats, fxt_dict_path, tmp_path):
+        gen = Generator(fxt_dict_path)
+        list(gen.iter_riddles())
+        expected = fxt_stats.counts["pairs tried"], fxt_stats.rejections.copy()
+
+        fxt_stats.reset()
+        if engine == "vectorized":
+            pytest.importorskip("numpy")
+            list(gen.iter_riddles(vectorized=True))
+        elif engine == "scored":
+            list(gen.iter_scored_riddles())
+        elif engine == "pairs":
+            gen._get_pairs()
+        else:
+            ResultStore(tmp_path / "store.json").update(gen)
+
+        assert (fxt_stats.counts["pairs tried"], fxt_stats.rejections) == expected
+
+    @pytest.mark.parametrize(("overlaps", "fuzzy"), [(True, False), (False, True)])
+    def test_additional_riddles(self, overlaps, fuzzy, fxt_stats, fxt_dict_path):
+        gen = Generator(fxt_dict_path)
+        list(gen.iter_all_riddles(overlaps=overlaps, fuzzy=fuzzy))
+        index_rejections = ("same word", "first vowel (index)")
+        rejected = sum(
+            n
+            for reason, n in fxt_stats.rejections.items()
+            if reason not in index_rejections
+        )
+
+        # Every pair that was tried is rejected at most once.
+        assert rejected + fxt_stats.counts["riddles"] <= fxt_stats.counts["pairs tried"]
+        assert fxt_stats.rejections["sound distance"] > 0
+
+    def test_generate_all(self, fxt_stats, fxt_dict_path, capsys):
+        gen = Generator(fxt_dict_path)
+        gen.generate_all()
+        serial = fxt_stats.counts.copy(), fxt_stats.rejections.copy()
+
+        fxt_stats.reset()
+        gen.generate_all(processes=2)
+        parallel = fxt_stats.counts.copy(), fxt_stats.rejections.copy()
+
+        assert serial == parallel
+        assert serial[0]["riddles"] > 0
+        assert "merge" in fxt_stats.timings
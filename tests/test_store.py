@@ -0,0 +1,61 @@
+import pytest
+import yaml
+
+from banone.generator import Generator
+from banone.stats import stats
+from banone.store import ResultStore
+
+
+class TestResultStore:
+    def test_update(self, fxt_dict_path, tmp_path):
+        store_path = tmp_path / "riddles.json"
+        gen = Generator(fxt_dict_path)
+
+        riddles = ResultStore(store_path).update(gen)
+
+        assert riddles == list(gen.iter_riddles())
+        assert ResultStore(store_path).riddles == riddles
+
+    def test_update_changed_dictionary(self, fxt_dict_path, tmp_path):
+        store_path = tmp_path / "riddles.json"
+        ResultStore(store_path).update(Generator(fxt_dict_path))
+
+        with fxt_dict_path.open(encoding="utf-8") as f:
+            entries = yaml.safe_load(f)
+        del entries["Fahne"]
+        entries["Banane"]["color"] = "grün"
+        entries["Kahn"] = {"phon": "'ka:n", "pos": "NN", "determiner": "ein"}
+        with fxt_dict_path.open("w", encoding="utf-8") as f:
+            yaml.safe_dump(entries, f, allow_unicode=True)
+
+        gen = Generator(fxt_dict_path)
+        stats.reset()
+        stats.enabled = True
+        try:
+            riddles = ResultStore(store_path).update(gen)
+            tried = stats.counts["pairs tried"]
+        finally:
+            stats.enabled = False
+            stats.reset()
+
+        assert riddles == list(gen.iter_riddles())
+        assert 0 < tried < 100
+
+    def test_save_temporary_files(self, tmp_path):
+        store = ResultStore(tmp_path / "riddles.json")
+        store.save()
+        store.save()
+
+        assert [p.name for p in tmp_path.iterdir()] == ["riddles.json"]
+
+    def test_save_error(self, tmp_path):
+        store_path = tmp_path / "riddles.json"
+        ResultStore(store_path).save()
+        store = ResultStore(store_path)
+        store.hashes["Banane"] = object()
+
+        with pytest.raises(TypeError):
+            store.save()
+
+        assert [p.name for p in tmp_path.iterdir()] == ["riddles.json"]
+        assert ResultStore(store_path).hashes == {}
@@ -0,0 +1,85 @@
+import pytest
+
+from banone.dictionary import Dictionary
+from banone.vectorized import VectorizedEngine
+
+pytest.importorskip("numpy")
+
+
+class TestVectorizedEngine:
+    @pytest.mark.parametrize("block_size", [1, 7, 64])
+    def test_iter_compounds(self, block_size, fxt_dict):
+        engine = VectorizedEngine(fxt_dict, block_size)
+        compounds = [
+            (base.orth, extra.orth, compound.orth)
+            for base, extra, compound in engine.iter_compounds()
+        ]
+
+        expected = []
+        for extra in fxt_dict:
+            for base in fxt_dict.iter_nouns():
+                if base.orth == extra.orth:
+                    continue
+                compound = base.merge(extra)
+                if compound:
+                    expected.append((base.orth, extra.orth, compound.orth))
+
+        assert compounds == expected
+
+    def test_groups(self, fxt_dict):
+        engine = VectorizedEngine(fxt_dict)
+
+        for extra_rows, base_rows in engine.groups.values():
+            bases = [engine.bases[col] for col in base_rows]
+
+            assert bases == list(fxt_dict.iter_bases(engine.extras[extra_rows[0]]))
+
+    def test_vowelless_nouns(self, tmp_path):
+        path = tmp_path / "dict.yaml"
+        path.write_text(
+            "Pst:\n    phon: p-st\n    pos: NN\n"
+            "Ast:\n    phon: ast\n    pos: NN\n"
+            "Kanone:\n    phon: ka-'no:-n@\n    pos: NN\n"
+            'Ton:\n    phon: "\'to:n"\n    pos: NN\n',
+            encoding="utf-8",
+        )
+        dictionary = Dictionary(path, use_cache=False)
+        compounds = [
+            (base.orth, extra.orth, compound.orth)
+            for base, extra, compound in VectorizedEngine(dictionary).iter_compounds()
+        ]
+
+        assert compounds == [
+            (base.orth, extra.orth, compound.orth)
+            for extra in dictionary
+            for base in dictionary.iter_bases(extra)
+            if base.orth != extra.orth
+            for compound in [base.merge(extra)]
+            if compound
+        ]
+        assert ("Pst", "Ast", "Ast") in compounds
+
+    def test_unaligned_nouns(self, tmp_path):
+        # The spelling does not match the pronunciation, so there are no sounds.
+        path = tmp_path / "dict.yaml"
+        path.write_text(
+            'Xylofon:\n    phon: "\'Ysy-lo-fo:n"\n    pos: NN\n'
+            "Kanone:\n    phon: ka-'no:-n@\n    pos: NN\n"
+            'Ton:\n    phon: "\'to:n"\n    pos: NN\n',
+            encoding="utf-8",
+        )
+        dictionary = Dictionary(path, use_cache=False)
+        compounds = [
+            (base.orth, extra.orth, compound.orth)
+            for base, extra, compound in VectorizedEngine(dictionary).iter_compounds()
+        ]
+
+        assert not len(dictionary.lookup("Xylofon").get_sound_sequence())
+        assert compounds == [
+            (base.orth, extra.orth, compound.orth)
+            for extra in dictionary
+            for base in dictionary.iter_bases(extra)
+            if base.orth != extra.orth
+            for compound in [base.merge(extra)]
+            if compound
+        ]